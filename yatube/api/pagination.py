@@ -0,0 +1,46 @@
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from posts.paginators import CursorPaginator
+
+
+class CursorPagination(BasePagination):
+    """Keyset-курсоры ленты из posts.paginators в формате ответа DRF.
+
+    Порядок берётся из атрибута ordering представления, размер страницы
+    задаётся параметром ?limit= (не больше max_page_size).
+    """
+    page_size = 20
+    max_page_size = 100
+    ordering = '-pub_date'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get('limit', self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        paginator = CursorPaginator(
+            queryset,
+            self.get_page_size(request),
+            getattr(view, 'ordering', self.ordering),
+        )
+        self.page = paginator.get_page(request.query_params.get('cursor'))
+        return list(self.page)
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, 'cursor', cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_link(self.page.next_cursor),
+            'previous': self.get_link(self.page.previous_cursor),
+            'results': data,
+        })
@@ -0,0 +1,71 @@
+from rest_framework import serializers
+from rest_framework.validators import UniqueTogetherValidator
+
+from posts import deletion, images
+from posts.models import Comment, Follow, Group, Post
+
+
+class PostSerializer(serializers.ModelSerializer):
+    # Плоские поля вместо вложенных сериализаторов: автор и группа уже
+    # пришли одним JOIN из Post.objects.for_feed().
+    author = serializers.CharField(source='author.username', read_only=True)
+
+    class Meta:
+        model = Post
+        fields = (
+            'id', 'text', 'author', 'pub_date', 'image', 'group',
+            'comment_count',
+        )
+        read_only_fields = ('comment_count',)
+
+    def validate_image(self, image):
+        if image:
+            return images.normalize(image)
+        return image
+
+
+class CommentSerializer(serializers.ModelSerializer):
+    author = serializers.CharField(source='author.username', read_only=True)
+
+    class Meta:
+        model = Comment
+        fields = ('id', 'author', 'post', 'text', 'created')
+        read_only_fields = ('post',)
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ('id', 'title', 'slug', 'description')
+
+
+class FollowSerializer(serializers.ModelSerializer):
+    user = serializers.SlugRelatedField(
+        slug_field='username',
+        read_only=True,
+        default=serializers.CurrentUserDefault(),
+    )
+    following = serializers.SlugRelatedField(
+        source='author',
+        slug_field='username',
+        # Удалённые пользователи ждут очистки и подписок не принимают.
+        queryset=deletion.visible_users(),
+    )
+
+    class Meta:
+        model = Follow
+        fields = ('user', 'following')
+        validators = [
+            UniqueTogetherValidator(
+                queryset=Follow.objects.all(),
+                fields=('user', 'following'),
+                message='Вы уже подписаны на этого автора.',
+            ),
+        ]
+
+    def validate_following(self, author):
+        if author == self.context['request'].user:
+            raise serializers.ValidationError(
+                'Нельзя подписаться на самого себя.'
+            )
+        return author
@@ -0,0 +1,167 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from posts import deletion
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Первый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest = APIClient()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.reader_client = APIClient()
+        self.reader_client.force_authenticate(self.reader)
+
+
+class PostApiTest(ApiTestCase):
+    def test_list_is_one_query(self):
+        for number in range(5):
+            post = Post.objects.create(author=self.user, text=str(number))
+            Comment.objects.create(post=post, author=self.reader, text='к')
+        with self.assertNumQueries(1):
+            response = self.guest.get('/api/posts/')
+        results = response.json()['results']
+        self.assertEqual(len(results), 6)
+        self.assertEqual(results[0]['author'], 'author')
+        self.assertEqual(results[0]['comment_count'], 1)
+
+    def test_cursor_pages(self):
+        for number in range(4):
+            Post.objects.create(author=self.user, text=str(number))
+        first = self.guest.get('/api/posts/', {'limit': 3}).json()
+        second = self.guest.get(first['next']).json()
+        self.assertEqual(len(first['results']), 3)
+        self.assertEqual(len(second['results']), 2)
+        self.assertIsNone(second['next'])
+        back = self.guest.get(second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+
+    def test_create_update_delete(self):
+        response = self.client.post(
+            '/api/posts/', {'text': 'Новый', 'group': self.group.pk})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['comment_count'], 0)
+        address = f"/api/posts/{response.json()['id']}/"
+        self.assertEqual(
+            self.reader_client.patch(address, {'text': 'Чужой'}).status_code,
+            403,
+        )
+        self.assertEqual(
+            self.client.patch(address, {'text': 'Свой'}).status_code, 200)
+        self.assertEqual(self.client.delete(address).status_code, 204)
+        self.assertEqual(
+            self.guest.post('/api/posts/', {'text': 'Гость'}).status_code,
+            401,
+        )
+
+
+class ConditionalGetTest(ApiTestCase):
+    def test_unchanged_list_returns_304_without_queries(self):
+        response = self.guest.get('/api/posts/')
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(0):
+            cached = self.guest.get(
+                '/api/posts/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], response['ETag'])
+        cached = self.guest.get(
+            '/api/posts/',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(cached.status_code, 304)
+
+    def test_changes_refresh_etag(self):
+        address = f'/api/posts/{self.post.pk}/'
+        etag = self.guest.get(address)['ETag']
+        Comment.objects.create(post=self.post, author=self.reader, text='к')
+        response = self.guest.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['comment_count'], 1)
+
+        etag = self.guest.get('/api/posts/')['ETag']
+        Post.objects.create(author=self.reader, text='Ещё')
+        response = self.guest.get('/api/posts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class CommentApiTest(ApiTestCase):
+    def test_comments(self):
+        address = f'/api/posts/{self.post.pk}/comments/'
+        response = self.reader_client.post(address, {'text': 'Коммент'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['author'], 'reader')
+        results = self.guest.get(address).json()['results']
+        self.assertEqual([c['text'] for c in results], ['Коммент'])
+        self.assertEqual(
+            self.guest.get('/api/posts/0/comments/').status_code, 404)
+
+
+class GroupFollowApiTest(ApiTestCase):
+    def test_groups_are_read_only_for_users(self):
+        self.assertEqual(len(self.guest.get('/api/group/').json()), 1)
+        response = self.client.post(
+            '/api/group/', {'title': 'Т', 'slug': 't', 'description': 'о'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_follow(self):
+        response = self.reader_client.post(
+            '/api/follow/', {'following': 'author'})
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(
+            Follow.objects.filter(user=self.reader, author=self.user).exists()
+        )
+        for following in ('author', 'reader'):
+            with self.subTest(following=following):
+                response = self.reader_client.post(
+                    '/api/follow/', {'following': following})
+                self.assertEqual(response.status_code, 400)
+        results = self.reader_client.get(
+            '/api/follow/', {'search': 'auth'}).json()['results']
+        self.assertEqual(results, [{'user': 'reader', 'following': 'author'}])
+        self.assertEqual(self.guest.get('/api/follow/').status_code, 401)
+
+
+    def test_cannot_follow_deleted_user(self):
+        deletion.delete_users(User.objects.filter(pk=self.user.pk))
+        response = self.reader_client.post(
+            '/api/follow/', {'following': 'author'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Follow.objects.filter(author=self.user).exists())
+
+
+@override_settings(THROTTLE_RATES={
+    'post_create': {'user': '1/m'},
+    'add_comment': {'user': '1/m'},
+    'profile_follow': {'user': '1/m'},
+})
+class ThrottleApiTest(ApiTestCase):
+    def test_creates_are_limited(self):
+        for address, data in (
+            ('/api/posts/', {'text': 'Пост'}),
+            (f'/api/posts/{self.post.pk}/comments/', {'text': 'Коммент'}),
+            ('/api/follow/', {'following': 'author'}),
+        ):
+            with self.subTest(address=address):
+                response = self.reader_client.post(address, data)
+                self.assertEqual(response.status_code, 201)
+                response = self.reader_client.post(address, data)
+                self.assertEqual(response.status_code, 429)
+                self.assertEqual(response['Retry-After'], '60')
+        # Чтение не ограничено.
+        response = self.reader_client.get('/api/posts/')
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,20 @@
+from rest_framework.throttling import BaseThrottle
+
+from core import throttling
+
+
+class WriteThrottle(BaseThrottle):
+    """Лимиты core.throttling на создание объектов через API.
+
+    Имя лимита берётся из throttle_scope представления, поэтому API и
+    HTML-формы тратят одни и те же корзины.
+    """
+
+    def allow_request(self, request, view):
+        self.retry_after = 0
+        if view.action == 'create':
+            self.retry_after = throttling.check(view.throttle_scope, request)
+        return not self.retry_after
+
+    def wait(self):
+        return self.retry_after
@@ -0,0 +1,145 @@
+from calendar import timegm
+
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import filters, mixins, permissions, viewsets
+
+from posts import caching, thumbnails
+from posts.models import Comment, Group, Post
+
+from .permissions import IsAdminOrReadOnly, IsAuthorOrReadOnly
+from .serializers import (
+    CommentSerializer, FollowSerializer, GroupSerializer, PostSerializer,
+)
+from .throttling import WriteThrottle
+
+
+class ConditionalMixin:
+    """ETag и Last-Modified по поколениям областей из posts.caching.
+
+    Валидаторы считаются до обращения к базе, поэтому ответ 304 стоит
+    пары чтений из кэша.
+    """
+
+    def get_cache_scopes(self):
+        raise NotImplementedError
+
+    def conditional(self, handler, request, *args, **kwargs):
+        scopes = [caching.SITE, *self.get_cache_scopes()]
+        etag = caching.etag(
+            request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''),
+            scopes=scopes,
+        )
+        last_modified = timegm(
+            caching.last_modified(scopes).utctimetuple()
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+
+class PostViewSet(ConditionalMixin, viewsets.ModelViewSet):
+    serializer_class = PostSerializer
+    permission_classes = (
+        permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly,
+    )
+    ordering = '-pub_date'
+    throttle_classes = (WriteThrottle,)
+    throttle_scope = 'post_create'
+
+    def get_queryset(self):
+        return Post.objects.for_feed()
+
+    def get_cache_scopes(self):
+        if 'pk' in self.kwargs:
+            return [caching.post_scope(self.kwargs['pk'])]
+        return [caching.POSTS]
+
+    def perform_create(self, serializer):
+        post = serializer.save(author=self.request.user)
+        if post.image:
+            transaction.on_commit(lambda: thumbnails.schedule(post))
+
+    def perform_update(self, serializer):
+        post = serializer.save()
+        if 'image' in serializer.validated_data and post.image:
+            transaction.on_commit(lambda: thumbnails.schedule(post))
+
+
+class CommentViewSet(ConditionalMixin, viewsets.ModelViewSet):
+    serializer_class = CommentSerializer
+    permission_classes = (
+        permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly,
+    )
+    ordering = '-created'
+    throttle_classes = (WriteThrottle,)
+    throttle_scope = 'add_comment'
+
+    def get_post(self):
+        return get_object_or_404(
+            Post.objects.only('pk'), pk=self.kwargs['post_id']
+        )
+
+    def get_queryset(self):
+        return self.get_post().comments.select_related('author').only(
+            'text', 'created', 'post', 'author', 'author__username'
+        )
+
+    def get_cache_scopes(self):
+        return [caching.post_scope(self.kwargs['post_id'])]
+
+    def perform_create(self, serializer):
+        serializer.save(author=self.request.user, post=self.get_post())
+
+
+class GroupViewSet(ConditionalMixin,
+                   mixins.CreateModelMixin,
+                   mixins.ListModelMixin,
+                   mixins.RetrieveModelMixin,
+                   viewsets.GenericViewSet):
+    queryset = Group.objects.all()
+    serializer_class = GroupSerializer
+    permission_classes = (IsAdminOrReadOnly,)
+    pagination_class = None
+
+    def get_cache_scopes(self):
+        return []
+
+
+class FollowViewSet(ConditionalMixin,
+                    mixins.CreateModelMixin,
+                    mixins.ListModelMixin,
+                    viewsets.GenericViewSet):
+    serializer_class = FollowSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+    filter_backends = (filters.SearchFilter,)
+    search_fields = ('author__username',)
+    ordering = '-id'
+    throttle_classes = (WriteThrottle,)
+    throttle_scope = 'profile_follow'
+
+    def get_queryset(self):
+        return self.request.user.follower.select_related(
+            'user', 'author'
+        ).only('user', 'author', 'user__username', 'author__username')
+
+    def get_cache_scopes(self):
+        return [caching.follows_scope(self.request.user.pk)]
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
@@ -0,0 +1,108 @@
+"""Пропускная способность API на странице из 100 постов.
+
+Создаёт временную тестовую базу, заполняет её постами с комментариями
+и меряет в одном процессе три режима:
+
+* serializer -- только PostSerializer(many=True) над готовым queryset;
+* request -- полный GET /api/posts/?limit=100 через тестовый клиент;
+* not-modified -- тот же запрос с If-None-Match, ответ 304.
+
+    python -m benchmarks.api --posts 1000 --seconds 3
+"""
+import argparse
+import json
+import os
+import time
+
+
+def measure(func, seconds):
+    func()
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        func()
+        count += 1
+    elapsed = time.perf_counter() - started
+    return {'calls': count, 'rps': round(count / elapsed, 1)}
+
+
+def populate(posts, comments_per_post):
+    from django.contrib.auth import get_user_model
+    from posts.models import Comment, Group, Post
+
+    User = get_user_model()
+    authors = [
+        User.objects.create_user(username=f'bench{number}')
+        for number in range(10)
+    ]
+    group = Group.objects.create(
+        title='Бенчмарк', slug='bench', description='Бенчмарк')
+    Post.objects.bulk_create(
+        Post(
+            author=authors[number % len(authors)],
+            group=group if number % 2 else None,
+            text=f'Пост номер {number} ' * 10,
+        )
+        for number in range(posts)
+    )
+    Comment.objects.bulk_create(
+        Comment(post_id=post_id, author=authors[0], text='Комментарий')
+        for post_id in Post.objects.values_list('pk', flat=True)
+        for _ in range(comments_per_post)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=1000)
+    parser.add_argument('--comments', type=int, default=3)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--settings', default='yatube.settings')
+    parser.add_argument('--json', help='Куда записать результаты.')
+    args = parser.parse_args()
+
+    os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+    import django
+    django.setup()
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    from rest_framework.test import APIClient, APIRequestFactory
+
+    from api.serializers import PostSerializer
+    from posts.models import Post
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        populate(args.posts, args.comments)
+        client = APIClient()
+        request = APIRequestFactory().get('/api/posts/')
+        address = '/api/posts/?limit=100'
+        etag = client.get(address)['ETag']
+
+        def serialize():
+            queryset = Post.objects.for_feed().order_by('-pub_date')[:100]
+            return PostSerializer(
+                queryset, many=True, context={'request': request}
+            ).data
+
+        results = {
+            'serializer': measure(serialize, args.seconds),
+            'request': measure(lambda: client.get(address), args.seconds),
+            'not-modified': measure(
+                lambda: client.get(address, HTTP_IF_NONE_MATCH=etag),
+                args.seconds,
+            ),
+        }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    for name, result in results.items():
+        print(f"{name:<13} rps={result['rps']:<8} calls={result['calls']}")
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Детерминированный генератор данных в формате export_posts.
+
+Один и тот же seed даёт один и тот же набор записей. Распределения
+похожи на настоящие: и число постов у авторов, и число подписчиков
+подчиняются степенному закону (несколько «звёзд» и длинный хвост), а
+небольшая доля постов собирает сотни комментариев.
+
+    python -m benchmarks.datagen --posts 100000 data.jsonl.gz
+    python manage.py import_posts data.jsonl.gz
+"""
+import argparse
+import itertools
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+WORDS = (
+    'утро кот город река книга поезд море снег лес окно чай дорога '
+    'музыка друг осень свет ветер письмо дом небо'
+).split()
+
+
+class Dataset:
+    def __init__(self, posts, seed=1, users=None, groups=None,
+                 follows_per_user=20, alpha=1.1, viral_share=0.005):
+        self.posts = posts
+        self.seed = seed
+        self.users = users or max(10, posts // 20)
+        self.groups = groups or max(1, posts // 2000)
+        self.follows_per_user = min(follows_per_user, self.users - 1)
+        self.viral_share = viral_share
+        # Вес автора номер i пропорционален 1 / (i + 1) ** alpha.
+        self.cum_weights = list(itertools.accumulate(
+            1 / (rank + 1) ** alpha for rank in range(self.users)
+        ))
+
+    def username(self, number):
+        return f'user{number}'
+
+    def slug(self, number):
+        return f'group{number}'
+
+    def comments_for(self, rng):
+        if rng.random() < self.viral_share:
+            return rng.randint(200, 2000)
+        return min(int(rng.expovariate(0.7)), 20)
+
+    def iter_posts(self):
+        """Посты по порядку; повторный вызов даёт ту же последовательность."""
+        rng = random.Random(self.seed)
+        moment = START
+        for pk in range(1, self.posts + 1):
+            author = rng.choices(
+                range(self.users), cum_weights=self.cum_weights
+            )[0]
+            moment += timedelta(seconds=rng.randint(1, 600))
+            group = rng.randrange(self.groups) if rng.random() < 0.6 else None
+            text = ' '.join(rng.choices(WORDS, k=rng.randint(5, 60)))
+            yield pk, author, group, text, moment, self.comments_for(rng)
+
+    def records(self):
+        rng = random.Random(self.seed + 1)
+        for number in range(self.users):
+            yield {
+                'type': 'user',
+                'username': self.username(number),
+                'first_name': f'Имя{number}',
+                'last_name': '',
+            }
+        for number in range(self.groups):
+            yield {
+                'type': 'group',
+                'slug': self.slug(number),
+                'title': f'Группа {number}',
+                'description': f'Описание группы {number}',
+            }
+        for pk, author, group, text, moment, _ in self.iter_posts():
+            yield {
+                'type': 'post',
+                'id': pk,
+                'author': self.username(author),
+                'group': self.slug(group) if group is not None else None,
+                'text': text,
+                'image': '',
+                'pub_date': moment.isoformat(),
+                'edited': moment.isoformat(),
+            }
+        # Второй проход по тем же постам: память не растёт с их числом.
+        for pk, _, _, _, moment, count in self.iter_posts():
+            for number in range(count):
+                yield {
+                    'type': 'comment',
+                    'post': pk,
+                    'author': self.username(rng.randrange(self.users)),
+                    'text': ' '.join(rng.choices(WORDS, k=rng.randint(1, 20))),
+                    'created': (
+                        moment + timedelta(seconds=60 * (number + 1))
+                    ).isoformat(),
+                }
+        for number in range(self.users):
+            followed = set(rng.choices(
+                range(self.users),
+                cum_weights=self.cum_weights,
+                k=self.follows_per_user,
+            ))
+            followed.discard(number)
+            for author in sorted(followed):
+                yield {
+                    'type': 'follow',
+                    'user': self.username(number),
+                    'author': self.username(author),
+                }
+
+
+def main():
+    from posts.transfer import open_stream
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', nargs='?', default='-')
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    with open_stream(args.path, 'w') as stream:
+        for record in Dataset(args.posts, seed=args.seed).records():
+            stream.write(json.dumps(record, ensure_ascii=False))
+            stream.write('\n')
+
+
+if __name__ == '__main__':
+    main()
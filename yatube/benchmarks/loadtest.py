@@ -0,0 +1,255 @@
+"""Нагрузочный прогон: пропускная способность при 1..N процессах.
+
+Поднимает pre-fork WSGI-сервер (как gunicorn --preload с sync-воркерами)
+на одном сокете, нагружает его параллельными клиентами и печатает
+запросы в секунду и задержки для каждого числа воркеров:
+
+    python -m benchmarks.loadtest --workers 1 2 4 --requests 2000 \\
+        --settings yatube.settings_production / /group/test/
+
+С --server wsgi asgi те же воркеры по очереди обслуживают запросы
+синхронно и через yatube.asgi (цикл asyncio плюс пул из --threads
+потоков на процесс), чтобы сравнить их на одном железе.
+
+База и кэш берутся из настроек, поэтому перед прогоном выполните
+migrate (и createcachetable для YATUBE_CACHE=db).
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import statistics
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http import HTTPStatus
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class PreforkServer(WSGIServer):
+    def __init__(self, sock, app):
+        super().__init__(
+            sock.getsockname(), QuietHandler, bind_and_activate=False
+        )
+        self.socket = sock
+        self.server_name = 'localhost'
+        self.server_port = sock.getsockname()[1]
+        self.setup_environ()
+        self.set_app(app)
+
+
+def serve(sock, app):
+    signal.signal(signal.SIGTERM, lambda *args: os._exit(0))
+    PreforkServer(sock, app).serve_forever()
+
+
+async def handle_asgi(app, reader, writer):
+    # Минимальный HTTP/1.1 без keep-alive: urllib всё равно закрывает
+    # соединение после каждого ответа.
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        method, target, version = lines[0].split(' ', 2)
+        headers = [
+            (name.strip().lower().encode('latin-1'),
+             value.strip().encode('latin-1'))
+            for name, value in (
+                line.split(':', 1) for line in lines[1:] if line
+            )
+        ]
+        length = int(dict(headers).get(b'content-length', 0))
+        body = await reader.readexactly(length) if length else b''
+    except (asyncio.IncompleteReadError, ValueError):
+        writer.close()
+        return
+    path, _, query = target.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': version.split('/', 1)[1],
+        'method': method,
+        'scheme': 'http',
+        'path': urllib.parse.unquote(path),
+        'raw_path': path.encode('latin-1'),
+        'query_string': query.encode('latin-1'),
+        'root_path': '',
+        'headers': headers,
+        'server': writer.get_extra_info('sockname')[:2],
+        'client': writer.get_extra_info('peername')[:2],
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status = message['status']
+            writer.write(
+                f'HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n'
+                .encode('latin-1')
+            )
+            for name, value in message.get('headers', []):
+                writer.write(name + b': ' + value + b'\r\n')
+            writer.write(b'Connection: close\r\n\r\n')
+        else:
+            writer.write(message.get('body', b''))
+            await writer.drain()
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        writer.close()
+
+
+def serve_asgi(sock, app):
+    signal.signal(signal.SIGTERM, lambda *args: os._exit(0))
+
+    async def main():
+        server = await asyncio.start_server(
+            lambda reader, writer: handle_asgi(app, reader, writer),
+            sock=sock, backlog=1024,
+        )
+        await server.serve_forever()
+
+    asyncio.run(main())
+
+
+def start_workers(app, workers, port, target=serve):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('127.0.0.1', port))
+    sock.listen(1024)
+    from django.db import connections
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    processes = [
+        context.Process(target=target, args=(sock, app), daemon=True)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    return sock, processes
+
+
+def client(args):
+    base_url, paths, count = args
+    latencies = []
+    errors = 0
+    for i in range(count):
+        url = base_url + paths[i % len(paths)]
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=30) as response:
+                response.read()
+        except (urllib.error.URLError, OSError):
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    return latencies, errors
+
+
+def percentile(values, share):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def run(base_url, paths, total, concurrency):
+    per_client = max(1, total // concurrency)
+    context = multiprocessing.get_context('fork')
+    started = time.perf_counter()
+    with context.Pool(concurrency) as pool:
+        results = pool.map(
+            client, [(base_url, paths, per_client)] * concurrency
+        )
+    elapsed = time.perf_counter() - started
+    latencies = [value for values, _ in results for value in values]
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors for _, errors in results),
+        'seconds': round(elapsed, 3),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2)
+        if latencies else 0.0,
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*', default=['/'])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--settings', default='yatube.settings_production')
+    parser.add_argument(
+        '--server', nargs='+', choices=['wsgi', 'asgi'], default=['wsgi']
+    )
+    parser.add_argument(
+        '--threads', type=int, help='Потоков на ASGI-воркер (ASGI_THREADS).'
+    )
+    parser.add_argument('--json', help='Куда записать результаты.')
+    args = parser.parse_args()
+
+    os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+    from django.conf import settings
+    from django.core.wsgi import get_wsgi_application
+    from core.asgi import WsgiToAsgi
+    app = get_wsgi_application()
+    threads = args.threads or settings.ASGI_THREADS
+    servers = {
+        'wsgi': (app, serve),
+        'asgi': (WsgiToAsgi(app, threads), serve_asgi),
+    }
+    base_url = f'http://127.0.0.1:{args.port}'
+
+    results = []
+    runs = [
+        (server, workers) for server in args.server
+        for workers in args.workers
+    ]
+    for server, workers in runs:
+        server_app, target = servers[server]
+        sock, processes = start_workers(
+            server_app, workers, args.port, target
+        )
+        try:
+            run(base_url, args.paths, args.concurrency, args.concurrency)
+            result = run(
+                base_url, args.paths, args.requests, args.concurrency
+            )
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
+            sock.close()
+        result['server'] = server
+        result['workers'] = workers
+        if server == 'asgi':
+            result['threads'] = threads
+        results.append(result)
+        gain = result['rps'] / results[0]['rps'] if results[0]['rps'] else 0
+        print(
+            f"{server} workers={workers:<3} rps={result['rps']:<8} "
+            f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+            f"errors={result['errors']} x{gain:.2f}"
+        )
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Рендеринг текста постов: фильтр linebreaks против готового text_html.
+
+Шаблон с лентой из --posts постов (тексты из benchmarks.datagen)
+рендерится --rounds раз в двух вариантах, база не нужна:
+
+    python -m benchmarks.markup --posts 20 --rounds 2000
+
+Печатает медиану и p95 на один рендер ленты и во сколько раз
+сохранённый HTML быстрее.
+"""
+import argparse
+import os
+import statistics
+import time
+
+from .loadtest import percentile
+
+TEMPLATES = {
+    'linebreaks': '{% for post in posts %}{{ post.text|linebreaks }}'
+                  '{% endfor %}',
+    'text_html': '{% for post in posts %}{{ post.text_html|safe }}'
+                 '{% endfor %}',
+}
+
+
+def make_posts(count, seed):
+    from posts import markup
+    from posts.models import Post
+
+    from .datagen import Dataset
+
+    posts = []
+    for _, _, _, text, _, _ in Dataset(count, seed=seed).iter_posts():
+        # Абзацы, как в настоящих постах.
+        text = text.replace(' кот ', '\n').replace(' дом ', '\n\n')
+        posts.append(Post(text=text, text_html=markup.render(text)))
+    return posts
+
+
+def measure(source, posts, rounds):
+    from django.template import Context, Template
+
+    template = Template(source)
+    context = Context({'posts': posts})
+    template.render(context)
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        template.render(context)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=20)
+    parser.add_argument('--rounds', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--settings', default='yatube.settings')
+    args = parser.parse_args()
+
+    os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+    import django
+    django.setup()
+
+    posts = make_posts(args.posts, args.seed)
+    medians = {}
+    for name, source in TEMPLATES.items():
+        timings = measure(source, posts, args.rounds)
+        medians[name] = statistics.median(timings)
+        print(
+            f'{name:<11} p50={medians[name] * 1000:.3f} ms '
+            f'p95={percentile(timings, 0.95) * 1000:.3f} ms'
+        )
+    print(f"text_html быстрее в "
+          f"{medians['linebreaks'] / medians['text_html']:.1f} раза")
+
+
+if __name__ == '__main__':
+    main()
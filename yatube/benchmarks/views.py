@@ -0,0 +1,200 @@
+"""Задержка, число запросов и пиковая память страниц на разных объёмах.
+
+Для каждого объёма создаётся временная тестовая база, заполняется
+генератором benchmarks.datagen через import_posts, после чего каждая
+страница запрашивается тестовым клиентом:
+
+    python -m benchmarks.views --scales 10000 100000 --json results.json
+
+По умолчанию кэш очищается перед каждым запросом (холодный кэш), чтобы
+мерить сами запросы к базе и рендеринг; --warm оставляет кэш фрагментов.
+Результаты с --json пригодны для сравнения прогонов между собой.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from .loadtest import percentile
+
+
+def generate(path, posts, seed):
+    from posts.transfer import open_stream
+
+    from .datagen import Dataset
+
+    with open_stream(path, 'w') as stream:
+        for record in Dataset(posts, seed=seed).records():
+            stream.write(json.dumps(record, ensure_ascii=False))
+            stream.write('\n')
+
+
+def pages():
+    """Адреса страниц и пользователь, от имени которого их открывать."""
+    from django.contrib.auth import get_user_model
+    from django.db.models import Count
+    from django.urls import reverse
+
+    from posts.models import Group, Post
+    from posts.paginators import POSTS_PER_PAGE, CursorPaginator
+
+    User = get_user_model()
+    star = User.objects.get(username='user0')
+    authors = list(
+        User.objects.annotate(posts_total=Count('posts'))
+        .filter(posts_total__gt=0).order_by('posts_total')
+        .values_list('username', flat=True)
+    )
+    group = Group.objects.annotate(
+        posts_total=Count('posts')
+    ).order_by('-posts_total').first()
+    viral = Post.objects.order_by('-comment_count', 'pk').first()
+    ordinary = Post.objects.filter(comment_count__lte=3).order_by('pk').last()
+    reader = User.objects.get(username='user1')
+    deep = Post.objects.order_by('-pub_date', '-pk')[
+        POSTS_PER_PAGE * 50 - 1:POSTS_PER_PAGE * 50
+    ].first() or viral
+    cursor = CursorPaginator(Post.objects.all(), POSTS_PER_PAGE).encode(
+        'next', deep
+    )
+    index = reverse('posts:index')
+    return [
+        ('index', index, None),
+        ('index ?page=51', f'{index}?page=51', None),
+        ('index ?cursor (page 51)', f'{index}?cursor={cursor}', None),
+        ('group_posts', reverse('posts:group_list', args=[group.slug]), None),
+        ('profile (top author)', reverse('posts:profile', args=[star]), None),
+        ('profile (median author)', reverse(
+            'posts:profile', args=[authors[len(authors) // 2]]
+        ), None),
+        ('follow_index', reverse('posts:follow_index'), reader),
+        ('post_detail (viral)', reverse(
+            'posts:post_detail', args=[viral.pk]
+        ), None),
+        ('post_detail (ordinary)', reverse(
+            'posts:post_detail', args=[ordinary.pk]
+        ), None),
+        ('search', reverse('posts:search') + '?q=кот', None),
+        ('api posts ?limit=100', '/api/posts/?limit=100', None),
+    ]
+
+
+def measure(client, address, requests, warm):
+    from django.core.cache import cache
+    from django.db import connection
+
+    def get():
+        if not warm:
+            cache.clear()
+        return client.get(address)
+
+    response = get()
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        get()
+        latencies.append(time.perf_counter() - started)
+    queries = []
+
+    def count(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        get()
+    tracemalloc.start()
+    get()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'status': response.status_code,
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'queries': len(queries),
+        'peak_kb': round(peak / 1024, 1),
+        'bytes': len(response.content),
+    }
+
+
+def run_scale(posts, args):
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'data.jsonl')
+            started = time.perf_counter()
+            generate(path, posts, args.seed)
+            call_command('import_posts', path, stdout=open(os.devnull, 'w'))
+            seeded = time.perf_counter() - started
+        print(f'posts={posts}: данные загружены за {seeded:.1f} с')
+        results = []
+        for name, address, user in pages():
+            client = Client()
+            if user is not None:
+                client.force_login(user)
+            result = measure(client, address, args.requests, args.warm)
+            result.update(scale=posts, view=name, address=address)
+            results.append(result)
+            print(
+                f"  {name:<26} p50={result['p50_ms']:<8} "
+                f"p95={result['p95_ms']:<8} queries={result['queries']:<3} "
+                f"peak={result['peak_kb']}KB status={result['status']}"
+            )
+        return {'scale': posts, 'seed_seconds': round(seeded, 1),
+                'views': results}
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--scales', type=int, nargs='+', default=[10000, 100000]
+    )
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--warm', action='store_true')
+    parser.add_argument('--settings', default='yatube.settings')
+    parser.add_argument('--json', help='Куда записать результаты.')
+    args = parser.parse_args()
+
+    os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+    import django
+    django.setup()
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    report = {
+        'revision': revision(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'seed': args.seed,
+        'requests': args.requests,
+        'cache': 'warm' if args.warm else 'cold',
+        'scales': [run_scale(posts, args) for posts in args.scales],
+    }
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
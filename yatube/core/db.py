@@ -0,0 +1,98 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Выставляет SQLITE_PRAGMAS на каждом новом соединении с SQLite."""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+_state = threading.local()
+
+
+class RoutingState:
+    def __init__(self, pinned=False):
+        # pinned: читать из основной базы; wrote: в неё уже писали.
+        self.pinned = pinned
+        self.wrote = False
+
+
+def current_state():
+    # Вне routing() (команды, фоновые потоки, shell) реплики не
+    # используются: там чаще читают только что записанное.
+    state = getattr(_state, 'current', None)
+    if state is None:
+        state = _state.current = RoutingState(pinned=True)
+    return state
+
+
+def reading_replicas():
+    """Могут ли следующие чтения текущего потока уйти в реплику."""
+    return bool(settings.DATABASE_REPLICAS) and not current_state().pinned
+
+
+def pin_primary():
+    """Оставшиеся чтения запроса идут в основную базу."""
+    current_state().pinned = True
+
+
+@contextmanager
+def routing(pinned=False):
+    """Отдельное состояние маршрутизации на время запроса или задачи."""
+    previous = getattr(_state, 'current', None)
+    state = _state.current = RoutingState(pinned)
+    try:
+        yield state
+    finally:
+        _state.current = previous
+
+
+class PrimaryReplicaRouter:
+    """Чтения уходят в реплики из DATABASE_REPLICAS, записи в default.
+
+    Чтение остаётся на основной базе, если поток уже что-то записал
+    (см. routing) или идёт транзакция на основной базе: реплика
+    ещё не видит этих изменений.
+    """
+
+    primary = DEFAULT_DB_ALIAS
+    # Таблица кэша хранит счётчики поколений, а сессия, не найденная в
+    # отставшей реплике, разлогинила бы пользователя. Их записи не
+    # считаются записями пользователя и чтения не закрепляют.
+    primary_only_apps = {'django_cache', 'sessions'}
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or current_state().pinned:
+            return self.primary
+        if model._meta.app_label in self.primary_only_apps:
+            return self.primary
+        if connections[self.primary].in_atomic_block:
+            return self.primary
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in self.primary_only_apps:
+            state = current_state()
+            state.pinned = state.wrote = True
+        return self.primary
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {self.primary, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплик приходит вместе с данными при репликации.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
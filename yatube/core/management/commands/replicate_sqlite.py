@@ -0,0 +1,52 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик. Заменяет '
+        'репликацию при локальной проверке DATABASE_REPLICAS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Файлы реплик; по умолчанию NAME из DATABASE_REPLICAS.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять каждые N секунд; 0 — скопировать один раз.',
+        )
+
+    def handle(self, *args, **options):
+        source = connections[DEFAULT_DB_ALIAS]
+        if source.vendor != 'sqlite':
+            raise CommandError('Команда работает только с SQLite.')
+        paths = options['paths'] or [
+            settings.DATABASES[alias]['NAME']
+            for alias in settings.DATABASE_REPLICAS
+        ]
+        if not paths:
+            raise CommandError('Нет реплик: задайте DATABASE_REPLICAS.')
+        while True:
+            started = time.monotonic()
+            source.ensure_connection()
+            for path in paths:
+                # Онлайн-бэкап SQLite даёт согласованный снимок, даже
+                # если в основную базу в это время пишут.
+                target = sqlite3.connect(path)
+                try:
+                    source.connection.backup(target)
+                finally:
+                    target.close()
+            self.stdout.write(
+                f'Реплик обновлено: {len(paths)} '
+                f'за {time.monotonic() - started:.2f} с'
+            )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core.throttling import counters
+
+
+class Command(BaseCommand):
+    help = 'Показывает, сколько запросов лимиты пропустили и отклонили.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Обнулить счётчики после вывода.',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"представление":<20} {"пропущено":>10} {"отклонено":>10} '
+            f'{"доля":>6}'
+        )
+        for view_name, counts in counters(options['reset']).items():
+            total = counts['allowed'] + counts['rejected']
+            share = counts['rejected'] / total if total else 0
+            self.stdout.write(
+                f'{view_name:<20} {counts["allowed"]:>10} '
+                f'{counts["rejected"]:>10} {share:>6.1%}'
+            )
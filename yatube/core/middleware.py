@@ -0,0 +1,171 @@
+"""Middleware проекта: профилирование, сжатие ответов и выбор базы.
+
+Профилирование включается настройкой PROFILING_ENABLED. Выключенное
+middleware отказывается от участия в обработке (MiddlewareNotUsed) и
+ничего не подменяет, так что в цепочке его просто нет.
+"""
+import functools
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware as BaseGZipMiddleware
+from django.template.base import Template
+
+from . import db
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class RequestProfile:
+    def __init__(self):
+        self.queries = []
+        self.sql = 0.0
+        self.template = 0.0
+        self.template_sql = 0.0
+        self.rendering = False
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.queries.append((sql, params, duration))
+            self.sql += duration
+            if self.rendering:
+                self.template_sql += duration
+
+
+def _profile_template_render():
+    # Считаем только внешний render: {% include %} и {% extends %}
+    # вызывают его вложенно. SQL ленивых querysets, выполненный во время
+    # рендеринга, относится к SQL, а не к шаблонам.
+    original = Template.render
+    if getattr(original, 'profiled', False):
+        return
+
+    @functools.wraps(original)
+    def render(self, context):
+        profile = getattr(_local, 'profile', None)
+        if profile is None or profile.rendering:
+            return original(self, context)
+        profile.rendering = True
+        started = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            profile.template += time.perf_counter() - started
+            profile.rendering = False
+
+    render.profiled = True
+    Template.render = render
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+class ProfilingMiddleware:
+    """Server-Timing для каждого ответа и журнал медленных запросов."""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow = settings.PROFILING_SLOW_REQUEST_MS / 1000
+        _profile_template_render()
+
+    def __call__(self, request):
+        profile = _local.profile = RequestProfile()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(profile.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            _local.profile = None
+        total = time.perf_counter() - started
+        template = profile.template - profile.template_sql
+        app = max(total - profile.sql - template, 0.0)
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={_ms(profile.sql)};'
+            f'desc="{len(profile.queries)} queries"',
+            f'tpl;dur={_ms(template)}',
+            f'app;dur={_ms(app)}',
+            f'total;dur={_ms(total)};desc="{view}"',
+        ])
+        if total >= self.slow:
+            self.log_slow(request, view, profile, total, template)
+        return response
+
+    def log_slow(self, request, view, profile, total, template):
+        lines = [
+            f'{_ms(duration):>8} ms  {sql} {params!r}'
+            for sql, params, duration in profile.queries
+        ]
+        logger.warning(
+            'Медленный запрос %s %s (%s): %s мс, SQL %s за %s мс, '
+            'шаблоны %s мс\n%s',
+            request.method, request.get_full_path(), view, _ms(total),
+            len(profile.queries), _ms(profile.sql), _ms(template),
+            '\n'.join(lines),
+        )
+
+
+class GZipMiddleware(BaseGZipMiddleware):
+    """Сжимает ответы не короче GZIP_MIN_LENGTH байт.
+
+    На коротких ответах gzip экономит меньше, чем стоит процессорного
+    времени, а то и раздувает их.
+    """
+
+    def process_response(self, request, response):
+        if not response.streaming and (
+            len(response.content) < settings.GZIP_MIN_LENGTH
+        ):
+            return response
+        return super().process_response(request, response)
+
+
+class ReplicaPinningMiddleware:
+    """Кто только что писал в базу, какое-то время читает из основной.
+
+    Запись отмечается cookie на REPLICA_PIN_SECONDS секунд: пока она
+    есть, чтения этого браузера не уходят в реплики и он видит свои
+    изменения, даже если реплики отстают. Небезопасные методы (POST и
+    т. п.) читают из основной базы всегда.
+    """
+
+    cookie_name = 'pin_primary'
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = (
+            request.method not in ('GET', 'HEAD', 'OPTIONS')
+            or self.cookie_name in request.COOKIES
+        )
+        with db.routing(pinned) as state:
+            response = self.get_response(request)
+        if state.wrote:
+            response.set_cookie(
+                self.cookie_name, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
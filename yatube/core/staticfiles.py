@@ -0,0 +1,176 @@
+"""Статика с отпечатками в именах и заранее сжатыми копиями.
+
+collectstatic через CompressedManifestStaticFilesStorage кладёт рядом с
+каждым текстовым файлом .gz и, если установлен пакет brotli, .br.
+StaticFilesMiddleware отдаёт их из STATIC_ROOT прямо из воркера:
+файлы с хэшем в имени кэшируются навсегда (immutable), остальные
+перепроверяются браузером.
+"""
+import gzip
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage, staticfiles_storage,
+)
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.json', '.map', '.txt', '.html', '.xml',
+)
+# Сжатие файлов меньше этого размера не окупается.
+MIN_COMPRESS_SIZE = 256
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+MUTABLE_CACHE_CONTROL = 'public, max-age=60'
+
+# Порядок важен: brotli сжимает текст лучше gzip.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(header):
+    """Кодировки, которые принимает клиент: 'gzip;q=0' -- запрет."""
+    weights = {}
+    for item in header.split(','):
+        name, *params = item.split(';')
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+    # '*' разрешает кодировки, не названные явно.
+    return {
+        encoding for encoding, _ in ENCODINGS
+        if weights.get(encoding, weights.get('*', 0.0)) > 0
+    }
+
+
+def compress(data):
+    """Сжатые варианты файла: {расширение: байты}, только выгодные."""
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data)
+    return {
+        suffix: compressed for suffix, compressed in variants.items()
+        if len(compressed) < len(data) * 0.95
+    }
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self._write_compressed(name)
+
+    def _write_compressed(self, name):
+        with self.open(name) as original:
+            data = original.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        for suffix, compressed in compress(data).items():
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+
+
+class StaticFile:
+    def __init__(self, path, immutable):
+        self.path = path
+        self.immutable = immutable
+        self.mtime = os.stat(path).st_mtime
+        content_type, _ = mimetypes.guess_type(path)
+        content_type = content_type or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type.endswith(
+            ('javascript', 'json', 'xml')
+        ):
+            content_type += '; charset=utf-8'
+        self.content_type = content_type
+        self.encodings = [
+            (encoding, path + suffix)
+            for encoding, suffix in ENCODINGS
+            if os.path.exists(path + suffix)
+        ]
+
+    def choose(self, accept_encoding):
+        if not self.encodings:
+            return None, self.path
+        accepted = accepted_encodings(accept_encoding)
+        for encoding, path in self.encodings:
+            if encoding in accepted:
+                return encoding, path
+        return None, self.path
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику без URL-маршрутов и представлений.
+
+    Список файлов читается из STATIC_ROOT один раз при старте воркера,
+    поэтому после collectstatic воркеры нужно перезапустить. При DEBUG
+    статику по-прежнему раздаёт runserver.
+    """
+
+    def __init__(self, get_response):
+        root = settings.STATIC_ROOT
+        if settings.DEBUG or not root or not os.path.isdir(root):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        hashed = getattr(staticfiles_storage, 'hashed_files', {})
+        hashed = set(hashed.values())
+        self.files = {}
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                self.files[name] = StaticFile(path, name in hashed)
+
+    def __call__(self, request):
+        path = request.path_info
+        if path.startswith(self.prefix) and request.method in ('GET', 'HEAD'):
+            static_file = self.files.get(path[len(self.prefix):])
+            if static_file is not None:
+                return self.serve(request, static_file)
+        return self.get_response(request)
+
+    def serve(self, request, static_file):
+        if not static_file.immutable and not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'), static_file.mtime
+        ):
+            return HttpResponseNotModified()
+        encoding, path = static_file.choose(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        response = FileResponse(
+            open(path, 'rb'), content_type=static_file.content_type
+        )
+        response['Content-Length'] = os.path.getsize(path)
+        response['Last-Modified'] = http_date(static_file.mtime)
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if static_file.encodings:
+            response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = (
+            IMMUTABLE_CACHE_CONTROL if static_file.immutable
+            else MUTABLE_CACHE_CONTROL
+        )
+        return response
@@ -6,3 +6,19 @@ register = template.Library()
 @register.filter
 def addclass(field, css):
     return field.as_widget(attrs={'class': css})
+
+
+@register.filter
+def lookup(mapping, key):
+    return mapping.get(key)
+
+
+@register.simple_tag(takes_context=True)
+def replace_query(context, **params):
+    query = context['request'].GET.copy()
+    for key, value in params.items():
+        if value:
+            query[key] = value
+        else:
+            query.pop(key, None)
+    return query.urlencode()
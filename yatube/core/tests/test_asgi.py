@@ -0,0 +1,58 @@
+import asyncio
+
+from django.core.wsgi import get_wsgi_application
+from django.test import SimpleTestCase
+
+from core.asgi import WsgiToAsgi
+
+
+class WsgiToAsgiTest(SimpleTestCase):
+    def call(self, app, scope, messages):
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(app(scope, receive, send))
+        return sent
+
+    def request(self, path, method='GET', body=b'', query=b''):
+        app = WsgiToAsgi(get_wsgi_application(), threads=2)
+        scope = {
+            'type': 'http', 'method': method, 'path': path,
+            'query_string': query, 'http_version': '1.1',
+            'headers': [(b'host', b'testserver')],
+        }
+        # Тело приходит частями, как от настоящего сервера.
+        messages = [
+            {'type': 'http.request', 'body': body[:3], 'more_body': True},
+            {'type': 'http.request', 'body': body[3:]},
+        ]
+        return self.call(app, scope, messages)
+
+    def test_response_is_sent_in_chunks(self):
+        start, *body = self.request('/about/author/')
+        self.assertEqual(start['type'], 'http.response.start')
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/html; charset=utf-8'),
+                      start['headers'])
+        self.assertIn('Об авторе'.encode(),
+                      b''.join(message.get('body', b'') for message in body))
+        self.assertFalse(body[-1].get('more_body', False))
+
+    def test_not_found(self):
+        start, *_ = self.request('/no/such/page/', query=b'a=1')
+        self.assertEqual(start['status'], 404)
+
+    def test_lifespan(self):
+        app = WsgiToAsgi(get_wsgi_application(), threads=1)
+        sent = self.call(app, {'type': 'lifespan'}, [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'},
+        ])
+        self.assertEqual(
+            [message['type'] for message in sent],
+            ['lifespan.startup.complete', 'lifespan.shutdown.complete'],
+        )
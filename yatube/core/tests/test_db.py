@@ -0,0 +1,112 @@
+import os
+import sqlite3
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections, router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase
+from django.test import override_settings
+from django.urls import reverse
+
+from core.db import routing
+from core.middleware import ReplicaPinningMiddleware
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class PrimaryReplicaRouterTest(SimpleTestCase):
+    def test_reads_go_to_replica_until_first_write(self):
+        with routing():
+            self.assertEqual(router.db_for_read(Post), 'replica')
+            self.assertEqual(router.db_for_write(Post), 'default')
+            self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_outside_of_request_reads_go_to_primary(self):
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        with routing():
+            self.assertEqual(router.db_for_read(Post), 'default')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_PIN_SECONDS=5)
+class ReplicaPinningMiddlewareTest(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def respond(self, request, write=False):
+        def view(request):
+            if write:
+                router.db_for_write(Post)
+            return HttpResponse(router.db_for_read(Post))
+        return ReplicaPinningMiddleware(view)(request)
+
+    def test_write_pins_following_reads(self):
+        response = self.respond(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica')
+        self.assertNotIn('pin_primary', response.cookies)
+
+        response = self.respond(self.factory.post('/'), write=True)
+        self.assertEqual(response.content, b'default')
+        self.assertEqual(response.cookies['pin_primary']['max-age'], 5)
+
+        request = self.factory.get('/')
+        request.COOKIES['pin_primary'] = '1'
+        self.assertEqual(self.respond(request).content, b'default')
+
+
+class ReplicateSQLiteTest(TransactionTestCase):
+    def test_copies_primary_to_replica(self):
+        User.objects.create_user(username='replicated')
+        path = os.path.join(tempfile.mkdtemp(), 'replica.sqlite3')
+        call_command('replicate_sqlite', path, stdout=StringIO())
+        replica = sqlite3.connect(path)
+        try:
+            usernames = replica.execute(
+                'SELECT username FROM auth_user'
+            ).fetchall()
+        finally:
+            replica.close()
+        self.assertIn(('replicated',), usernames)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_PIN_SECONDS=60)
+class LaggingReplicaTest(TransactionTestCase):
+    """Реплика -- снимок базы, сделанный до последнего поста."""
+
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(username='author')
+        Post.objects.create(author=author, text='Старый пост')
+        path = os.path.join(tempfile.mkdtemp(), 'replica.sqlite3')
+        call_command('replicate_sqlite', path, stdout=StringIO())
+        connections.databases['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': path,
+        }
+        self.addCleanup(self.drop_replica)
+        Post.objects.create(author=author, text='Свежий пост')
+
+    def drop_replica(self):
+        connections['replica'].close()
+        del connections.databases['replica']
+        delattr(connections._connections, 'replica')
+
+    def test_replica_lags(self):
+        with self.settings(REPLICA_PIN_SECONDS=0):
+            response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Свежий пост')
+
+    def test_recent_changes_are_cached_from_primary(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Свежий пост')
+        # Страница уже в кэше под новыми поколениями и не устарела.
+        with self.settings(REPLICA_PIN_SECONDS=0):
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Свежий пост')
@@ -0,0 +1,63 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+class ProfilingMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='author')
+        Post.objects.create(author=user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(PROFILING_ENABLED=True, PROFILING_SLOW_REQUEST_MS=1e6)
+    def test_server_timing(self):
+        response = self.client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        queries = int(re.search(r'desc="(\d+) queries"', timing).group(1))
+        self.assertGreater(queries, 0)
+        for metric in ('db;dur=', 'tpl;dur=', 'app;dur=', 'total;dur='):
+            self.assertIn(metric, timing)
+        self.assertIn('desc="posts:index"', timing)
+
+    @override_settings(PROFILING_ENABLED=True, PROFILING_SLOW_REQUEST_MS=0)
+    def test_slow_requests_are_logged_with_sql(self):
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            self.client.get(reverse('posts:index'))
+        self.assertIn('posts:index', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+
+class GZipMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_large_pages_are_compressed(self):
+        Post.objects.create(
+            author=User.objects.create_user(username='writer'),
+            text='Длинный пост ' * 200,
+        )
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    @override_settings(GZIP_MIN_LENGTH=10 ** 6)
+    def test_short_responses_are_not_compressed(self):
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertNotIn('Content-Encoding', response)
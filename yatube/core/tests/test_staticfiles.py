@@ -0,0 +1,65 @@
+import gzip
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import SimpleTestCase, override_settings
+
+STATIC_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    STATIC_ROOT=STATIC_ROOT,
+    STATICFILES_STORAGE=(
+        'core.staticfiles.CompressedManifestStaticFilesStorage'
+    ),
+)
+class StaticFilesTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+
+    def test_hashed_file_is_precompressed_and_immutable(self):
+        url = static('css/bootstrap.min.css')
+        self.assertRegex(url, r'bootstrap\.min\.[0-9a-f]{12}\.css$')
+        plain = self.client.get(url)
+        compressed = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(compressed['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', compressed['Cache-Control'])
+        self.assertEqual(
+            gzip.decompress(b''.join(compressed.streaming_content)),
+            b''.join(plain.streaming_content),
+        )
+
+    def test_unhashed_name_is_revalidated(self):
+        response = self.client.get('/static/css/bootstrap.min.css')
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response = self.client.get(
+            '/static/css/bootstrap.min.css',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_file_is_reported(self):
+        with self.assertRaises(ValueError):
+            static('img/missing.png')
+
+    def test_refused_encoding_is_not_sent(self):
+        url = static('css/bootstrap.min.css')
+        for header, encoding in (
+            ('gzip;q=0', None),
+            ('gzip;q=0.5, br;q=0', 'gzip'),
+            ('*', 'gzip'),
+            ('*, gzip;q=0', None),
+        ):
+            with self.subTest(header=header):
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING=header)
+                self.assertEqual(response.get('Content-Encoding'), encoding)
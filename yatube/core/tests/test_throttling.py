@@ -0,0 +1,94 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.throttling import check, client_ip, counters
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(THROTTLE_RATES={
+    'post_create': {'user': '2/m', 'ip': '3/m'},
+    'signup': {'ip': '1/h'},
+})
+class ThrottleTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='spammer')
+        cls.other = User.objects.create_user(username='neighbour')
+
+    def setUp(self):
+        cache.clear()
+
+    def create_post(self, user):
+        self.client.force_login(user)
+        return self.client.post(
+            reverse('posts:post_create'), {'text': 'Пост'}
+        )
+
+    def test_user_and_ip_limits(self):
+        self.assertEqual(self.create_post(self.user).status_code, 302)
+        self.assertEqual(self.create_post(self.user).status_code, 302)
+        response = self.create_post(self.user)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        # Другой пользователь с того же адреса упирается в лимит IP.
+        self.assertEqual(self.create_post(self.other).status_code, 302)
+        self.assertEqual(self.create_post(self.other).status_code, 429)
+        self.assertEqual(Post.objects.count(), 3)
+        self.assertEqual(
+            counters()['post_create'], {'allowed': 3, 'rejected': 2}
+        )
+
+    def test_tokens_refill(self):
+        request = RequestFactory().post('/')
+        request.user = self.user
+        self.assertEqual(check('post_create', request, now=0), 0)
+        self.assertEqual(check('post_create', request, now=0), 0)
+        self.assertEqual(check('post_create', request, now=10), 20)
+        self.assertEqual(check('post_create', request, now=30), 0)
+
+    def test_only_writes_are_limited(self):
+        self.client.post(reverse('users:signup'), {})
+        response = self.client.get(reverse('users:signup'))
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(reverse('users:signup'), {})
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(THROTTLE_TRUSTED_PROXIES=['10.0.0.0/8'])
+    def test_client_ip_behind_trusted_proxy(self):
+        factory = RequestFactory()
+        for remote, forwarded, expected in (
+            ('10.0.0.1', '203.0.113.5', '203.0.113.5'),
+            ('10.0.0.1', '1.1.1.1, 203.0.113.5, 10.0.0.2', '203.0.113.5'),
+            ('198.51.100.7', '203.0.113.5', '198.51.100.7'),
+            ('10.0.0.1', '', '10.0.0.1'),
+        ):
+            with self.subTest(remote=remote, forwarded=forwarded):
+                request = factory.post(
+                    '/', REMOTE_ADDR=remote, HTTP_X_FORWARDED_FOR=forwarded)
+                self.assertEqual(client_ip(request), expected)
+
+    @override_settings(THROTTLE_TRUSTED_PROXIES=['127.0.0.1'])
+    def test_clients_behind_proxy_have_own_buckets(self):
+        for number in range(3):
+            response = self.client.post(
+                reverse('users:signup'), {},
+                HTTP_X_FORWARDED_FOR=f'203.0.113.{number}',
+            )
+            self.assertEqual(response.status_code, 200)
+        response = self.client.post(
+            reverse('users:signup'), {}, HTTP_X_FORWARDED_FOR='203.0.113.0')
+        self.assertEqual(response.status_code, 429)
+
+    def test_stats_command(self):
+        self.create_post(self.user)
+        output = StringIO()
+        call_command('throttle_stats', '--reset', stdout=output)
+        self.assertRegex(output.getvalue(), r'post_create\s+1\s+0')
+        self.assertEqual(counters()['post_create']['allowed'], 0)
@@ -0,0 +1,153 @@
+"""Ограничение частоты запросов на запись.
+
+Лимиты задаются для каждого представления в THROTTLE_RATES отдельно
+для пользователя и для IP-адреса, например
+{'post_create': {'user': '10/m', 'ip': '30/m'}}. Каждый лимит — это
+корзина токенов в общем кэше: N запросов подряд, затем по одному каждые
+period / N секунд. Корзина хранится одним числом, «теоретическим
+временем прихода» (GCRA), поэтому на проверку уходит одно чтение и
+одна запись в кэш. Без атомарной операции в кэше параллельные запросы
+изредка проскакивают сверх лимита, для защиты от потока записей этого
+достаточно.
+"""
+import functools
+import ipaddress
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+OUTCOMES = ('allowed', 'rejected')
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def _bucket_key(view_name, kind, ident):
+    return f'throttle:{view_name}:{kind}:{ident}'
+
+
+def _counter_key(view_name, outcome):
+    return f'throttle:count:{view_name}:{outcome}'
+
+
+def _trusted(address):
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(
+        ip in ipaddress.ip_network(network)
+        for network in settings.THROTTLE_TRUSTED_PROXIES
+    )
+
+
+def client_ip(request):
+    """Адрес клиента; за доверенным прокси -- из X-Forwarded-For.
+
+    Цепочка X-Forwarded-For читается справа, пропуская доверенные
+    прокси: левее первого чужого адреса клиент может вписать что угодно.
+    """
+    address = request.META.get('REMOTE_ADDR', '')
+    if not _trusted(address):
+        return address
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    for hop in reversed([hop.strip() for hop in forwarded.split(',')]):
+        if not hop:
+            continue
+        address = hop
+        if not _trusted(hop):
+            break
+    return address
+
+
+def check(view_name, request, now=None):
+    """Списывает токены и возвращает 0 или через сколько секунд повторить.
+
+    Запрос проходит, только если токены есть во всех его корзинах;
+    отклонённый запрос токенов не тратит.
+    """
+    rates = settings.THROTTLE_RATES.get(view_name, {})
+    idents = {'ip': client_ip(request)}
+    if request.user.is_authenticated:
+        idents['user'] = request.user.pk
+    buckets = [
+        (_bucket_key(view_name, kind, idents[kind]), *parse_rate(rate))
+        for kind, rate in rates.items() if kind in idents
+    ]
+    if not buckets:
+        return 0
+    now = time.time() if now is None else now
+    stored = cache.get_many([key for key, _, _ in buckets])
+    updates = {}
+    retry_after = 0
+    for key, count, period in buckets:
+        interval = period / count
+        arrival = max(stored.get(key, now), now) + interval
+        # Корзина вмещает count токенов: время прихода может убегать
+        # вперёд не больше чем на period.
+        if arrival - now > period:
+            retry_after = max(retry_after, arrival - now - period)
+        else:
+            updates[key] = arrival
+    if not retry_after:
+        # Ключ живёт, пока корзина не наполнится снова.
+        for key, arrival in updates.items():
+            cache.set(key, arrival, math.ceil(arrival - now))
+    _count(view_name, 'rejected' if retry_after else 'allowed')
+    return retry_after
+
+
+def _count(view_name, outcome):
+    key = _counter_key(view_name, outcome)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Счётчик вытеснили между add и incr: этот запрос не посчитаем.
+        pass
+
+
+def counters(reset=False):
+    """{view_name: {'allowed': N, 'rejected': M}} для всех лимитов."""
+    keys = {
+        _counter_key(view_name, outcome): (view_name, outcome)
+        for view_name in settings.THROTTLE_RATES
+        for outcome in OUTCOMES
+    }
+    values = cache.get_many(keys)
+    if reset:
+        cache.delete_many(keys)
+    result = {}
+    for key, (view_name, outcome) in keys.items():
+        result.setdefault(view_name, {})[outcome] = values.get(key, 0)
+    return result
+
+
+def throttle(view_name, methods=('POST',)):
+    """Ответ 429 с Retry-After, когда лимиты view_name исчерпаны.
+
+    Считаются только запросы с методами из methods; None — все.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                retry_after = check(view_name, request)
+                if retry_after:
+                    response = render(
+                        request, 'core/429.html',
+                        {'retry_after': math.ceil(retry_after)},
+                        status=429,
+                    )
+                    response['Retry-After'] = math.ceil(retry_after)
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapped
+    return decorator
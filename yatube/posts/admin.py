@@ -1,20 +1,82 @@
 from django.contrib import admin
-from .models import Post, Group
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+from django.db.models import QuerySet
 
+from . import deletion
+from .forms import PostForm
+from .models import Post, Group, UserDeletion
 
-class PostAdmin(admin.ModelAdmin):
+User = get_user_model()
+
+
+class PostAdminForm(PostForm):
+    # Картинки из админки проходят ту же обработку, что и с сайта.
+    class Meta(PostForm.Meta):
+        fields = '__all__'
+
+
+class SoftDeleteAdminMixin:
+    """Удаление из админки только скрывает объекты.
+
+    Кнопка «Удалить» и действие delete_selected вызывают soft_delete, а
+    строки вместе с зависимыми удаляет purge_deleted. Страница
+    подтверждения не собирает каскад, который может быть огромным.
+    """
+    soft_delete = None
+
+    def get_deleted_objects(self, objs, request):
+        if isinstance(objs, QuerySet):
+            count = objs.count()
+        else:
+            count = len(objs)
+        deleted_objects = [str(obj) for obj in objs[:100]]
+        model_count = {self.opts.verbose_name_plural: count}
+        return deleted_objects, model_count, set(), []
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(
+            request, self.model._base_manager.filter(pk=obj.pk)
+        )
+
+    def delete_queryset(self, request, queryset):
+        count = self.soft_delete(queryset)
+        self.message_user(
+            request,
+            f'Скрыто: {count}. Строки удалит команда purge_deleted.',
+        )
+
+
+class PostAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
+    form = PostAdminForm
+    soft_delete = staticmethod(deletion.delete_posts)
     list_display = (
         'pk',
         'text',
         'pub_date',
         'author',
         'group',
+        'is_deleted',
     )
     list_editable = ('group',)
     search_fields = ('text',)
-    list_filter = ('pub_date',)
+    list_filter = ('pub_date', 'is_deleted')
     empty_value_display = '-пусто-'
 
+    def get_queryset(self, request):
+        return Post.all_objects.all()
+
+
+class SoftDeleteUserAdmin(SoftDeleteAdminMixin, UserAdmin):
+    soft_delete = staticmethod(deletion.delete_users)
+
+
+class UserDeletionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'requested')
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
+admin.site.register(UserDeletion, UserDeletionAdmin)
+admin.site.unregister(User)
+admin.site.register(User, SoftDeleteUserAdmin)
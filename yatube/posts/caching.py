@@ -0,0 +1,185 @@
+"""Версионированный кэш страниц лент и карточек постов.
+
+Каждая область (вся лента, группа, автор, пост, подписки пользователя)
+имеет счётчик поколения в кэше. Ключи фрагментов включают поколения
+своих областей, а сигналы увеличивают счётчики при изменениях. Старые
+фрагменты просто перестают запрашиваться, поэтому их можно хранить
+часами без риска показать устаревшую страницу.
+
+Пока реплики могут не видеть недавних изменений области, запрос с её
+ключами читает из основной базы (см. generations).
+"""
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from core import db
+
+SITE = 'site'
+POSTS = 'posts'
+TRENDING = 'trending'
+
+_batch = threading.local()
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def follows_scope(user_id):
+    return f'follows:{user_id}'
+
+
+def followers_scope(author_id):
+    return f'followers:{author_id}'
+
+
+def _key(scope):
+    return f'generation:{scope}'
+
+
+def _mtime_key(scope):
+    return f'mtime:{scope}'
+
+
+def generations(scopes):
+    keys = [_key(scope) for scope in scopes]
+    if not db.reading_replicas():
+        found = cache.get_many(keys)
+    else:
+        mtime_keys = [_mtime_key(scope) for scope in scopes]
+        found = cache.get_many(keys + mtime_keys)
+        _pin_after_recent_changes(found, mtime_keys)
+    for key in keys:
+        if key not in found:
+            # Начальное значение от времени: после вытеснения счётчика
+            # новое поколение не совпадёт ни с одним из прежних.
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def _pin_after_recent_changes(found, mtime_keys):
+    # Под ключами с новыми поколениями нельзя сохранять данные из
+    # отставшей реплики. Отставание считаем не больше REPLICA_PIN_SECONDS,
+    # как и при закреплении после записи.
+    now = time.time()
+    horizon = now - settings.REPLICA_PIN_SECONDS
+    for key in mtime_keys:
+        if key not in found:
+            cache.add(key, now, None)
+        if found.pop(key, now) > horizon:
+            db.pin_primary()
+
+
+@contextmanager
+def site_wide():
+    """Сводит все bump внутри блока к одному bump(SITE) на выходе.
+
+    SITE входит в ключи всех страниц, так что массовые удаления
+    сбрасывают кэш сайта один раз, а не поколение каждого поста.
+    """
+    if getattr(_batch, 'active', False):
+        yield
+        return
+    _batch.active, _batch.bumped = True, False
+    try:
+        yield
+    finally:
+        _batch.active = False
+        if _batch.bumped:
+            bump(SITE)
+
+
+def bump(*scopes):
+    if getattr(_batch, 'active', False):
+        _batch.bumped = True
+        return
+    scopes = set(scopes)
+    for scope in scopes:
+        try:
+            cache.incr(_key(scope))
+        except ValueError:
+            cache.add(_key(scope), time.time_ns(), None)
+    now = time.time()
+    cache.set_many({_mtime_key(scope): now for scope in scopes}, None)
+
+
+def last_modified(scopes):
+    """Время последнего изменения областей для заголовка Last-Modified.
+
+    Если отметка вытеснена из кэша, считаем, что область изменилась
+    только что: клиент один раз получит полный ответ вместо 304.
+    """
+    keys = [_mtime_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    now = time.time()
+    for key in keys:
+        if key not in found:
+            cache.add(key, now, None)
+            found[key] = cache.get(key, now)
+    return datetime.fromtimestamp(max(found.values()), timezone.utc)
+
+
+def etag(*parts, scopes=()):
+    """Слабый ETag из поколений областей и того, что ещё влияет на ответ."""
+    versions = generations(scopes)
+    raw = ':'.join(map(str, [*parts, *versions]))
+    return 'W/"%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+
+def bump_post(author_id, *group_ids, post_id=None):
+    scopes = [POSTS, author_scope(author_id)]
+    scopes += [group_scope(pk) for pk in group_ids if pk is not None]
+    if post_id is not None:
+        scopes.append(post_scope(post_id))
+    bump(*scopes)
+
+
+def page_key(request, *scopes):
+    """Ключ страницы ленты: поколения областей, позиция и зритель."""
+    scopes = [SITE, *scopes]
+    user = request.user
+    if user.is_authenticated:
+        viewer = f'user{user.pk}'
+        scopes.append(follows_scope(user.pk))
+    else:
+        viewer = 'anon'
+    position = request.GET.get('cursor') or request.GET.get('page') or ''
+    versions = generations(scopes)
+    return ':'.join([viewer, position, *map(str, versions)])
+
+
+def card_versions(posts):
+    def versions():
+        posts_list = list(posts)
+        site, *cards = generations(
+            [SITE] + [post_scope(post.pk) for post in posts_list]
+        )
+        return {
+            post.pk: f'{site}.{card}'
+            for post, card in zip(posts_list, cards)
+        }
+    return SimpleLazyObject(versions)
+
+
+def feed_context(request, page_obj, *scopes):
+    return {
+        'feed_cache_key': page_key(request, *scopes),
+        'feed_cache_timeout': settings.FEED_CACHE_TIMEOUT,
+        'card_versions': card_versions(page_obj),
+    }
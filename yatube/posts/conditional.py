@@ -0,0 +1,130 @@
+"""Условный GET для HTML-страниц постов.
+
+Для каждой страницы описана её область: какие посты и комментарии на
+неё влияют и какие поколения кэша (posts.caching) её инвалидируют.
+Last-Modified -- самое позднее из Post.edited, Comment.created и
+отметок изменения областей (последние ловят удаления, которых по
+данным в базе не видно). ETag дополнительно учитывает зрителя и адрес.
+Всё это считается до основного запроса и рендеринга шаблона, поэтому
+неизменившаяся страница отдаётся ответом 304.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Subquery
+from django.views.decorators.http import condition
+
+from . import caching, deletion
+from .models import Comment, Group, Post
+
+
+class Scope:
+    def __init__(self, post_filter, scopes):
+        self.post_filter = post_filter
+        self.scopes = [caching.SITE, *scopes]
+
+    def latest_change(self):
+        """Самые поздние Post.edited и Comment.created области."""
+        comment_filter = {
+            f'post__{key}': value for key, value in self.post_filter.items()
+        }
+        # Оба максимума одним запросом, каждый берётся из своего индекса.
+        edited = Post.objects.filter(**self.post_filter).order_by(
+            '-edited'
+        ).values('edited')[:1]
+        commented = Comment.objects.filter(**comment_filter).order_by(
+            '-created'
+        ).values('created')[:1]
+        rows = Post.objects.order_by().annotate(
+            last_edited=Subquery(edited),
+            last_commented=Subquery(commented),
+        ).values_list('last_edited', 'last_commented')[:1]
+        return [value for row in rows for value in row if value is not None]
+
+    def last_modified(self, extra_scopes=()):
+        # Результат запроса к базе меняется только вместе с поколениями
+        # областей, поэтому хранится в кэше под ключом из них.
+        versions = caching.generations(self.scopes)
+        key = 'last-modified:' + ':'.join(
+            map(str, [*self.scopes, *versions])
+        )
+        values = cache.get(key)
+        if values is None:
+            values = self.latest_change()
+            cache.set(key, values, settings.FEED_CACHE_TIMEOUT)
+        scopes = [*self.scopes, *extra_scopes]
+        return max([*values, caching.last_modified(scopes)])
+
+
+def index_scope(request):
+    return Scope({}, [caching.POSTS])
+
+
+def group_scope(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        return None
+    return Scope({'group_id': group_id}, [caching.group_scope(group_id)])
+
+
+def profile_scope(request, username):
+    author_id = deletion.visible_users().filter(
+        username=username
+    ).values_list('pk', flat=True).first()
+    if author_id is None:
+        return None
+    return Scope({'author_id': author_id}, [
+        caching.author_scope(author_id),
+        caching.follows_scope(author_id),
+        caching.followers_scope(author_id),
+    ])
+
+
+def post_scope(request, post_id):
+    author_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', flat=True
+    ).first()
+    if author_id is None:
+        return None
+    return Scope({'pk': post_id}, [
+        caching.post_scope(post_id), caching.author_scope(author_id),
+    ])
+
+
+def _viewer_scopes(request):
+    if request.user.is_authenticated:
+        return [caching.follows_scope(request.user.pk)]
+    return []
+
+
+def conditional_page(scope_func):
+    """Вешает на представление ETag и Last-Modified области scope_func.
+
+    scope_func получает аргументы представления и возвращает Scope или
+    None, если объекта нет (тогда представление само ответит 404).
+    """
+    def get_scope(request, *args, **kwargs):
+        if not hasattr(request, '_conditional_scope'):
+            request._conditional_scope = scope_func(request, *args, **kwargs)
+        return request._conditional_scope
+
+    def etag(request, *args, **kwargs):
+        scope = get_scope(request, *args, **kwargs)
+        if scope is None:
+            return None
+        user = request.user
+        viewer = f'user{user.pk}' if user.is_authenticated else 'anon'
+        return caching.etag(
+            viewer,
+            request.get_full_path(),
+            scopes=[*scope.scopes, *_viewer_scopes(request)],
+        )
+
+    def last_modified(request, *args, **kwargs):
+        scope = get_scope(request, *args, **kwargs)
+        if scope is None:
+            return None
+        return scope.last_modified(_viewer_scopes(request))
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
@@ -0,0 +1,108 @@
+"""Мягкое удаление постов и пользователей и очистка по частям.
+
+Удаление из админки только помечает строки: менеджеры objects сразу
+перестают отдавать посты и комментарии, а удалённый пользователь теряет
+вход и страницу профиля. Сами строки со всеми зависимыми удаляет
+purge_deleted пачками по chunk_size, каждая в своей транзакции: SQLite
+не блокируется надолго, а кэш и поисковый индекс обновляются обычными
+сигналами удаления. Счётчики posts.stats пересчитываются при скрытии.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from . import caching, stats
+from .models import Comment, Follow, Post, TimelineEntry, UserDeletion
+
+User = get_user_model()
+
+
+def visible_users():
+    """Пользователи без тех, кто ждёт очистки."""
+    return User.objects.filter(deletion__isnull=True)
+
+
+def delete_posts(posts):
+    """Скрывает посты с комментариями и возвращает число постов."""
+    comments = Comment.objects.filter(post__in=posts)
+    user_ids = set(posts.values_list('author_id', flat=True))
+    user_ids.update(comments.values_list('author_id', flat=True))
+    with transaction.atomic():
+        comments.update(is_deleted=True)
+        count = posts.update(is_deleted=True)
+        stats.refresh(users=user_ids)
+    caching.bump(caching.SITE)
+    return count
+
+
+def delete_users(users):
+    """Отключает пользователей и скрывает их посты и комментарии."""
+    user_ids = list(users.values_list('pk', flat=True))
+    with transaction.atomic():
+        UserDeletion.objects.bulk_create(
+            [UserDeletion(user_id=user_id) for user_id in user_ids],
+            ignore_conflicts=True,
+        )
+        User.objects.filter(pk__in=user_ids).update(is_active=False)
+        Comment.objects.filter(
+            Q(author__in=user_ids) | Q(post__author__in=user_ids)
+        ).update(is_deleted=True)
+        Post.objects.filter(author__in=user_ids).update(is_deleted=True)
+        # Строки уже скрыты, но по ним ещё видно, чьи счётчики менять.
+        follows = Follow.objects.filter(
+            Q(user__in=user_ids) | Q(author__in=user_ids)
+        )
+        hidden_comments = Comment.all_objects.filter(
+            Q(author__in=user_ids) | Q(post__author__in=user_ids)
+        )
+        stats.refresh(
+            users=User.objects.filter(
+                Q(pk__in=follows.values('user'))
+                | Q(pk__in=follows.values('author'))
+                | Q(pk__in=hidden_comments.values('author'))
+            ),
+            posts=hidden_comments.values('post'),
+        )
+    caching.bump(caching.SITE)
+    return len(user_ids)
+
+
+def stages():
+    """Что удалять и в каком порядке: (название, queryset).
+
+    Зависимые строки удаляются раньше тех, на кого ссылаются, так что
+    каскад при удалении каждой пачки ничего не находит.
+    """
+    deleted_posts = Post.all_objects.filter(is_deleted=True)
+    yield 'Комментарии', Comment.all_objects.filter(is_deleted=True)
+    yield 'Комментарии удалённых постов', Comment.all_objects.filter(
+        post__in=deleted_posts
+    )
+    yield 'Записи лент', TimelineEntry.objects.filter(post__in=deleted_posts)
+    yield 'Посты', deleted_posts
+    for user_id in list(UserDeletion.objects.values_list('user', flat=True)):
+        yield f'Подписки {user_id}', Follow.objects.filter(
+            Q(user=user_id) | Q(author=user_id)
+        )
+        yield f'Лента {user_id}', TimelineEntry.objects.filter(user=user_id)
+        yield f'Пользователь {user_id}', User.objects.filter(pk=user_id)
+
+
+def purge(chunk_size=500):
+    """Удаляет помеченное; после пачки отдаёт (этап, удалено, всего)."""
+    for stage, queryset in stages():
+        total = queryset.count()
+        if not total:
+            continue
+        done = 0
+        while True:
+            pks = list(
+                queryset.order_by('pk').values_list('pk', flat=True)
+                [:chunk_size]
+            )
+            if not pks:
+                break
+            with transaction.atomic(), caching.site_wide(), stats.paused():
+                queryset.model._base_manager.filter(pk__in=pks).delete()
+            done += len(pks)
+            yield stage, done, total
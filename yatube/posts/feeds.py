@@ -0,0 +1,193 @@
+"""RSS и Atom для всего сайта, групп и авторов.
+
+Лента строится одним запросом (for_feed) и хранится в кэше под
+поколениями своих областей (posts.caching), так что любое изменение
+постов области её сбрасывает. ETag и Last-Modified считаются по одним
+только поколениям и отметкам изменения, без запросов к постам:
+опрашивающий клиент обычно получает 304 или готовый XML из кэша.
+"""
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+from django.views.decorators.http import condition
+
+from . import caching, deletion
+from .models import Group, Post
+
+FEED_SIZE = 20
+
+
+class PostsFeed(Feed):
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.posts(obj).for_feed()[:FEED_SIZE]
+
+    def item_title(self, post):
+        return Truncator(post.text).words(8)
+
+    def item_description(self, post):
+        return post.text_html
+
+    def item_link(self, post):
+        return reverse('posts:post_detail', args=[post.pk])
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_updateddate(self, post):
+        return post.edited
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+    def item_author_link(self, post):
+        return reverse('posts:profile', args=[post.author.username])
+
+    def item_categories(self, post):
+        return [post.group.title] if post.group else []
+
+
+class SiteFeed(PostsFeed):
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов.'
+
+    def link(self):
+        return reverse('posts:index')
+
+
+class GroupFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def posts(self, group):
+        return group.posts.all()
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', args=[group.slug])
+
+
+class AuthorFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(
+            deletion.visible_users(), username=username
+        )
+
+    def posts(self, author):
+        return author.posts.all()
+
+    def title(self, author):
+        return f'Yatube: {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return f'Записи пользователя {author.username}.'
+
+    def link(self, author):
+        return reverse('posts:profile', args=[author.username])
+
+
+class AtomMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        description = self.description
+        return description(obj) if callable(description) else description
+
+
+class SiteAtomFeed(AtomMixin, SiteFeed):
+    pass
+
+
+class GroupAtomFeed(AtomMixin, GroupFeed):
+    pass
+
+
+class AuthorAtomFeed(AtomMixin, AuthorFeed):
+    pass
+
+
+def site_scopes():
+    return [caching.SITE, caching.POSTS]
+
+
+def group_scopes(slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        return None
+    return [caching.SITE, caching.group_scope(group_id)]
+
+
+def author_scopes(username):
+    author_id = deletion.visible_users().filter(
+        username=username
+    ).values_list('pk', flat=True).first()
+    if author_id is None:
+        return None
+    return [caching.SITE, caching.author_scope(author_id)]
+
+
+def cached_feed(feed, scopes_func):
+    """Представление ленты с кэшем по поколениям и условным GET.
+
+    scopes_func получает аргументы URL и возвращает области ленты или
+    None, если группы или автора нет (тогда ответит 404 сама лента).
+    """
+    def get_scopes(request, **kwargs):
+        if not hasattr(request, '_feed_scopes'):
+            request._feed_scopes = scopes_func(**kwargs)
+        return request._feed_scopes
+
+    def etag(request, **kwargs):
+        scopes = get_scopes(request, **kwargs)
+        if scopes is None:
+            return None
+        return caching.etag(
+            'feed', request.build_absolute_uri(request.path), scopes=scopes
+        )
+
+    def last_modified(request, **kwargs):
+        scopes = get_scopes(request, **kwargs)
+        if scopes is None:
+            return None
+        return caching.last_modified(scopes)
+
+    @condition(etag_func=etag, last_modified_func=last_modified)
+    def view(request, **kwargs):
+        scopes = get_scopes(request, **kwargs)
+        if scopes is None:
+            return feed(request, **kwargs)
+        # Ссылки в ленте абсолютные, поэтому ключ учитывает домен.
+        url = request.build_absolute_uri(request.path)
+        versions = caching.generations(scopes)
+        key = 'feed:' + ':'.join(map(str, [url, *versions]))
+        cached = cache.get(key)
+        if cached is None:
+            response = feed(request, **kwargs)
+            cached = (response.content, response['Content-Type'])
+            cache.set(key, cached, settings.FEED_CACHE_TIMEOUT)
+        content, content_type = cached
+        return HttpResponse(content, content_type=content_type)
+
+    return view
+
+
+site_rss = cached_feed(SiteFeed(), site_scopes)
+site_atom = cached_feed(SiteAtomFeed(), site_scopes)
+group_rss = cached_feed(GroupFeed(), group_scopes)
+group_atom = cached_feed(GroupAtomFeed(), group_scopes)
+author_rss = cached_feed(AuthorFeed(), author_scopes)
+author_atom = cached_feed(AuthorAtomFeed(), author_scopes)
@@ -0,0 +1,54 @@
+"""Проверки подписок с кэшем на время запроса.
+
+Результаты запоминаются на объекте пользователя (request.user живёт
+ровно один запрос), так что повторные проверки одного автора в шапке
+профиля и в карточках ленты не ходят в базу.
+"""
+from django.utils.functional import SimpleLazyObject
+
+from .models import Follow
+
+
+def _memo(user):
+    memo = getattr(user, '_following_memo', None)
+    if memo is None:
+        memo = {}
+        user._following_memo = memo
+    return memo
+
+
+def is_following(user, author):
+    if not user.is_authenticated:
+        return False
+    author_id = getattr(author, 'pk', author)
+    memo = _memo(user)
+    if author_id not in memo:
+        memo[author_id] = Follow.objects.filter(
+            user=user, author_id=author_id
+        ).exists()
+    return memo[author_id]
+
+
+def following_map(user, authors):
+    """Словарь {id автора: подписан ли user} за один запрос."""
+    author_ids = {getattr(author, 'pk', author) for author in authors}
+    if not user.is_authenticated:
+        return dict.fromkeys(author_ids, False)
+    memo = _memo(user)
+    missing = author_ids - memo.keys()
+    if missing:
+        followed = set(Follow.objects.filter(
+            user=user, author_id__in=missing
+        ).values_list('author_id', flat=True))
+        memo.update({pk: pk in followed for pk in missing})
+    return {pk: memo[pk] for pk in author_ids}
+
+
+def page_following_map(user, page_obj):
+    """following_map для авторов страницы, считается при первом обращении.
+
+    Если страница отдана из кэша фрагментов, запрос не выполняется.
+    """
+    return SimpleLazyObject(lambda: following_map(
+        user, [post.author_id for post in page_obj]
+    ))
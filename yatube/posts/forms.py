@@ -1,4 +1,6 @@
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import ModelForm
+from . import images
 from .models import Post, Comment
 
 
@@ -7,6 +9,13 @@ class PostForm(ModelForm):
         model = Post
         fields = ('group', 'text', 'image')
 
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        # Уже сохранённую картинку при редактировании не трогаем.
+        if isinstance(image, UploadedFile):
+            return images.normalize(image)
+        return image
+
 
 class CommentForm(ModelForm):
     class Meta:
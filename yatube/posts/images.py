@@ -0,0 +1,121 @@
+"""Обработка картинок постов при загрузке.
+
+Загрузка пишется на диск кусками и дальше лимита не сохраняется.
+Картинка проверяется по размеру файла и числу пикселей, поворачивается
+по EXIF, уменьшается до POST_IMAGE_MAX_SIDE и перекодируется без
+метаданных. Файл называется по sha256 своего содержимого, поэтому
+одинаковые картинки лежат на диске и нарезаются в миниатюры один раз.
+"""
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from django.utils.deconstruct import deconstructible
+from PIL import Image, ImageOps
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку во временный файл, но не дальше лимита.
+
+    Размер файла всё равно считается полностью, и форма отклоняет
+    слишком большой файл, не открывая его.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.POST_IMAGE_MAX_UPLOAD_SIZE:
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, где имя файла определяется его содержимым.
+
+    Если такой файл уже есть, он не перезаписывается и не получает
+    суффикс: поле просто ссылается на существующий.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is not None and self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+
+storage = ContentAddressedStorage()
+
+
+def upload_to(instance, filename):
+    # Раскладываем по подкаталогам, чтобы не копить файлы в одном.
+    return f'posts/{filename[:2]}/{filename}'
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA', 'PA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+
+
+def normalize(upload):
+    """Проверяет загруженную картинку и возвращает готовый к записи файл."""
+    if upload.size > settings.POST_IMAGE_MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            'Файл больше %(limit)s.',
+            code='file_too_large',
+            params={'limit': filesizeformat(
+                settings.POST_IMAGE_MAX_UPLOAD_SIZE
+            )},
+        )
+    upload.seek(0)
+    try:
+        image = Image.open(upload)
+        width, height = image.size
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError(
+            'Не удалось прочитать картинку.', code='invalid_image'
+        )
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка больше %(limit)s мегапикселей.',
+            code='too_many_pixels',
+            params={'limit': settings.POST_IMAGE_MAX_PIXELS // 10 ** 6},
+        )
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    # JPEG сразу декодируется в уменьшенном масштабе: это в разы
+    # быстрее и легче по памяти, чем разворачивать все пиксели.
+    image.draft('RGB', (max_side, max_side))
+    icc_profile = image.info.get('icc_profile')
+    try:
+        image = ImageOps.exif_transpose(image)
+    except OSError:
+        raise ValidationError(
+            'Не удалось прочитать картинку.', code='invalid_image'
+        )
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    options = {'optimize': True}
+    if icc_profile:
+        # Цветовой профиль нужен для правильных цветов, это не метаданные.
+        options['icc_profile'] = icc_profile
+    if _has_alpha(image):
+        image.convert('RGBA').save(buffer, 'PNG', **options)
+        extension = 'png'
+    else:
+        image.convert('RGB').save(
+            buffer, 'JPEG', quality=settings.POST_IMAGE_QUALITY,
+            progressive=True, **options
+        )
+        extension = 'jpg'
+    data = buffer.getvalue()
+    digest = hashlib.sha256(data).hexdigest()
+    return ContentFile(data, name=f'{digest}.{extension}')
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает списки популярных постов и групп.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять каждые N секунд; 0 — посчитать один раз.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            posts, groups = trending.refresh()
+            self.stdout.write(
+                f'Популярных постов: {posts}, групп: {groups} '
+                f'за {time.monotonic() - started:.2f} с'
+            )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
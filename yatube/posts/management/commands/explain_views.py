@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from posts import search, timeline
+from posts.models import Comment, Follow, Group, Post, TrendingGroup
+from posts.paginators import (
+    COMMENTS_PER_PAGE, POSTS_PER_PAGE, CursorPaginator,
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Печатает план выполнения основного запроса каждой страницы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help='Пользователь для запросов.')
+        parser.add_argument('--slug', help='Группа для запросов.')
+        parser.add_argument(
+            '--query', default='пост', help='Строка для запроса поиска.'
+        )
+
+    def handle(self, *args, **options):
+        user = self.sample(User, username=options['username'])
+        group = self.sample(Group, slug=options['slug'])
+        post = self.sample(Post)
+        comment = self.sample(Comment)
+        for name, queryset in self.queries(user, group, post, comment):
+            self.write_plan(name, str(queryset.query), queryset.explain())
+        # Поиск FTS5 идёт сырым SQL, его план строит сам бэкенд.
+        self.write_plan('search', *search.get_backend().explain(
+            options['query'], per_page=POSTS_PER_PAGE
+        ))
+        if connection.vendor != 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                f'Планы построены для {connection.vendor}, не SQLite.'
+            ))
+
+    def write_plan(self, name, sql, plan):
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        self.stdout.write(sql)
+        self.stdout.write(plan)
+        self.stdout.write('')
+
+    def sample(self, model, **lookup):
+        lookup = {key: value for key, value in lookup.items() if value}
+        obj = model.objects.filter(**lookup).order_by('pk').first()
+        return obj or model(pk=1, **lookup)
+
+    def page(self, post_list):
+        return CursorPaginator(post_list, POSTS_PER_PAGE).order_by()[
+            :POSTS_PER_PAGE + 1
+        ]
+
+    def queries(self, user, group, post, comment):
+        next_page = CursorPaginator(Post.objects.for_feed(), POSTS_PER_PAGE)
+        comments = CursorPaginator(
+            Comment.objects.filter(post=post).select_related('author'),
+            COMMENTS_PER_PAGE, ordering='-created',
+        )
+        return [
+            ('index', self.page(Post.objects.for_feed())),
+            ('index ?cursor=', next_page.order_by().filter(
+                next_page.after(post.pub_date or timezone.now(), post.pk)
+            )[:POSTS_PER_PAGE + 1]),
+            ('group_posts', self.page(
+                Post.objects.filter(group=group).for_feed()
+            )),
+            ('profile', self.page(
+                Post.objects.filter(author=user).for_feed()
+            )),
+            ('profile: following', Follow.objects.filter(
+                user=user, author=user
+            )),
+            ('profile: followers', Follow.objects.filter(author=user)),
+            ('follow_index: timeline', timeline.entries_for(user).order_by(
+                '-pub_date', '-post_id'
+            )[:POSTS_PER_PAGE + 1]),
+            ('follow_index: pull', timeline.pulled_for(user).order_by(
+                '-pub_date', '-pk'
+            )[:POSTS_PER_PAGE + 1]),
+            ('post_detail', Post.objects.filter(pk=post.pk)),
+            ('post_comments', comments.order_by()[:COMMENTS_PER_PAGE + 1]),
+            ('post_comments ?cursor=', comments.order_by().filter(
+                comments.after(comment.created or timezone.now(), comment.pk)
+            )[:COMMENTS_PER_PAGE + 1]),
+            ('trending', Post.objects.for_feed().filter(
+                trending__rank__gte=1
+            ).order_by('trending__rank')),
+            ('trending_groups', TrendingGroup.objects.select_related(
+                'group'
+            )),
+        ]
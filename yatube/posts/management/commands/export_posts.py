@@ -0,0 +1,108 @@
+import json
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from posts.models import Comment, Follow, Group, Post
+from posts.transfer import open_stream, rate
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает пользователей, группы, посты, комментарии и подписки '
+        'в JSON Lines. Файлы картинок не копируются, только их имена.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл для выгрузки (.gz сжимается), по умолчанию stdout.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        # Если данные идут в stdout, отчёт пишем в stderr.
+        report = self.stderr if options['path'] == '-' else self.stdout
+        counts = Counter()
+        started = time.monotonic()
+        with open_stream(options['path'], 'w') as stream:
+            for record in self.records(options['chunk_size']):
+                stream.write(json.dumps(record, ensure_ascii=False))
+                stream.write('\n')
+                counts[record['type']] += 1
+        elapsed = time.monotonic() - started
+        total = sum(counts.values())
+        details = ', '.join(
+            f'{name}: {count}' for name, count in counts.items()
+        )
+        report.write(
+            f'Выгружено строк: {total} ({details}) за {elapsed:.1f} с, '
+            f'{rate(total, elapsed)}'
+        )
+
+    def records(self, chunk_size):
+        users = User.objects.order_by('pk').values_list(
+            'username', 'first_name', 'last_name'
+        )
+        for username, first_name, last_name in users.iterator(chunk_size):
+            yield {
+                'type': 'user',
+                'username': username,
+                'first_name': first_name,
+                'last_name': last_name,
+            }
+        groups = Group.objects.order_by('pk').values_list(
+            'slug', 'title', 'description'
+        )
+        for slug, title, description in groups.iterator(chunk_size):
+            yield {
+                'type': 'group',
+                'slug': slug,
+                'title': title,
+                'description': description,
+            }
+        posts = Post.objects.order_by('pk').values_list(
+            'pk', 'author__username', 'group__slug', 'text', 'image',
+            'pub_date', 'edited',
+        )
+        for pk, author, group, text, image, pub_date, edited in (
+            posts.iterator(chunk_size)
+        ):
+            yield {
+                'type': 'post',
+                'id': pk,
+                'author': author,
+                'group': group,
+                'text': text,
+                'image': image,
+                'pub_date': pub_date.isoformat(),
+                'edited': edited.isoformat(),
+            }
+        # Только комментарии выгруженных постов, иначе их не загрузить.
+        comments = Comment.objects.filter(
+            post__is_deleted=False
+        ).order_by('pk').values_list(
+            'post_id', 'author__username', 'text', 'created'
+        )
+        for post_id, author, text, created in comments.iterator(chunk_size):
+            yield {
+                'type': 'comment',
+                'post': post_id,
+                'author': author,
+                'text': text,
+                'created': created.isoformat(),
+            }
+        follows = Follow.objects.order_by('pk').values_list(
+            'user__username', 'author__username', 'created'
+        )
+        for user, author, created in follows.iterator(chunk_size):
+            yield {
+                'type': 'follow',
+                'user': user,
+                'author': author,
+                'created': created.isoformat() if created else None,
+            }
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = (
+        'Раскладывает по лентам подписки, которые читаются напрямую: '
+        'оформленные до появления лент или загруженные import_posts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        filled = 0
+        for size in timeline.fill(options['batch_size']):
+            filled += size
+            self.stdout.write(f'Подписок обработано: {filled}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {filled} подписок за {time.monotonic() - started:.1f} с'
+        ))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import deletion
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет скрытые посты, комментарии и пользователей вместе с '
+        'зависимыми строками небольшими пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Пауза между пачками в секундах, чтобы пропустить '
+                 'запись других процессов.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять каждые N секунд; 0 — очистить один раз.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            chunks = 0
+            for stage, done, total in deletion.purge(options['chunk_size']):
+                chunks += 1
+                self.stdout.write(f'{stage}: {done} из {total}')
+                if options['pause']:
+                    time.sleep(options['pause'])
+            self.stdout.write(
+                f'Пачек удалено: {chunks} '
+                f'за {time.monotonic() - started:.1f} с'
+            )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Post
+from posts.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс постов пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        batch_size = options['batch_size']
+        started = time.monotonic()
+        backend.clear()
+        indexed = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk).order_by('pk')
+                .only('pk', 'text')[:batch_size]
+            )
+            if not batch:
+                break
+            with transaction.atomic():
+                backend.index(batch)
+            indexed += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'Проиндексировано постов: {indexed}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {indexed} постов за {time.monotonic() - started:.1f} с'
+        ))
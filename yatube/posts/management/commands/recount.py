@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Comment, Post, ProfileStats
+from posts.stats import (
+    COUNTERS, count_subquery, with_comment_counts, with_counts,
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики профилей и комментариев постов '
+        'и чинит расхождения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        checked = repaired = 0
+        last_pk = 0
+        while True:
+            users = list(
+                with_counts(User.objects.filter(pk__gt=last_pk))
+                .select_related('stats').order_by('pk')[:chunk_size]
+            )
+            if not users:
+                break
+            with transaction.atomic():
+                for user in users:
+                    repaired += self.repair(user)
+            checked += len(users)
+            last_pk = users[-1].pk
+        self.stdout.write(
+            f'Проверено профилей: {checked}, исправлено: {repaired}'
+        )
+        checked, repaired = self.repair_posts(chunk_size)
+        self.stdout.write(
+            f'Проверено постов: {checked}, исправлено: {repaired}'
+        )
+
+    def repair_posts(self, chunk_size):
+        checked = repaired = 0
+        last_pk = 0
+        while True:
+            posts = list(
+                with_comment_counts(Post.objects.filter(pk__gt=last_pk))
+                .order_by('pk').values_list(
+                    'pk', 'comment_count', 'actual_comment_count'
+                )[:chunk_size]
+            )
+            if not posts:
+                break
+            stale = [pk for pk, stored, actual in posts if stored != actual]
+            if stale:
+                Post.objects.filter(pk__in=stale).update(
+                    comment_count=count_subquery(Comment.objects, 'post')
+                )
+            repaired += len(stale)
+            checked += len(posts)
+            last_pk = posts[-1][0]
+        return checked, repaired
+
+    def repair(self, user):
+        actual = {name: getattr(user, f'actual_{name}') for name in COUNTERS}
+        try:
+            stored = user.stats
+        except ProfileStats.DoesNotExist:
+            ProfileStats.objects.create(user=user, **actual)
+            return 1
+        if all(getattr(stored, name) == value
+               for name, value in actual.items()):
+            return 0
+        ProfileStats.objects.filter(user=user).update(**actual)
+        return 1
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import caching, markup
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Строит HTML текста постов и комментариев пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перестроить всё, например после смены '
+                 'POSTS_MARKUP_RENDERER, а не только пустые.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        for model in (Post, Comment):
+            rendered = 0
+            for size in markup.backfill(
+                model, options['batch_size'], missing_only=not options['all']
+            ):
+                rendered += size
+                self.stdout.write(f'{model.__name__}: обработано {rendered}')
+        # bulk_update не отправляет сигналы: сбрасываем кэш всех страниц.
+        caching.bump(caching.SITE)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с'
+        ))
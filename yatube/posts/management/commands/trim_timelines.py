@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Удаляет из лент подписок записи сверх TIMELINE_SIZE.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять каждые N секунд; 0 — обрезать один раз.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            trimmed = timeline.trim_all()
+            self.stdout.write(
+                f'Обрезано лент: {trimmed} '
+                f'за {time.monotonic() - started:.2f} с'
+            )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,51 @@
+"""HTML текста постов и комментариев, который хранится рядом с текстом.
+
+Текст превращается в HTML один раз при сохранении (поле text_html), а
+шаблоны выводят готовую разметку без фильтров. Способ рендеринга задаёт
+POSTS_MARKUP_RENDERER; после его смены сохранённый HTML перестраивает
+команда render_text_html --all.
+"""
+from django.conf import settings
+from django.utils.html import linebreaks, urlize
+from django.utils.module_loading import import_string
+
+
+def plain(text):
+    """Абзацы и переносы строк, как фильтр linebreaks."""
+    return linebreaks(text, autoescape=True)
+
+
+def linkify(text):
+    """Как plain, но адреса и e-mail становятся ссылками с nofollow."""
+    return linebreaks(
+        urlize(text, nofollow=True, autoescape=True), autoescape=False
+    )
+
+
+def render(text):
+    return import_string(settings.POSTS_MARKUP_RENDERER)(text)
+
+
+def backfill(model, batch_size=1000, missing_only=True):
+    """Перестраивает text_html пачками по pk и отдаёт размеры пачек.
+
+    Работает и с историческими моделями миграций: save() не вызывается,
+    поэтому ни сигналы, ни auto_now не срабатывают.
+    """
+    queryset = model.objects.order_by('pk').only('pk', 'text', 'text_html')
+    if missing_only:
+        queryset = queryset.filter(text_html='')
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return
+        changed = []
+        for obj in batch:
+            html = render(obj.text)
+            if html != obj.text_html:
+                obj.text_html = html
+                changed.append(obj)
+        model.objects.bulk_update(changed, ['text_html'])
+        last_pk = batch[-1].pk
+        yield len(batch)
@@ -0,0 +1,126 @@
+# Generated by Django 2.2.19 on 2026-10-18 16:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class IfMissing(migrations.operations.base.Operation):
+    """Меняет схему, только если таблицы или столбца ещё нет.
+
+    В базах, созданных до сброса истории миграций (например в
+    db.sqlite3 из репозитория), эти таблицы уже есть; состояние моделей
+    обновляется в любом случае.
+    """
+
+    reduces_to_sql = False
+
+    def __init__(self, operation, table, column=None):
+        self.operation = operation
+        self.table = table
+        self.column = column
+
+    def deconstruct(self):
+        return (
+            self.__class__.__name__, [self.operation, self.table],
+            {'column': self.column},
+        )
+
+    def state_forwards(self, app_label, state):
+        self.operation.state_forwards(app_label, state)
+
+    def exists(self, connection):
+        introspection = connection.introspection
+        with connection.cursor() as cursor:
+            if self.table not in introspection.table_names(cursor):
+                return False
+            if self.column is None:
+                return True
+            return self.column in [
+                column.name for column in
+                introspection.get_table_description(cursor, self.table)
+            ]
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if not self.exists(schema_editor.connection):
+            self.operation.database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        self.operation.database_backwards(
+            app_label, schema_editor, from_state, to_state
+        )
+
+    def describe(self):
+        return f'{self.operation.describe()} (если нет {self.table})'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0001_initial'),
+    ]
+
+    operations = [
+        IfMissing(migrations.CreateModel(
+            name='Group',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('slug', models.SlugField(unique=True)),
+                ('description', models.TextField()),
+            ],
+        ), 'posts_group'),
+        migrations.AlterModelOptions(
+            name='post',
+            options={'ordering': ['-pub_date'], 'verbose_name': 'Пост', 'verbose_name_plural': 'Посты'},
+        ),
+        IfMissing(migrations.AddField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, upload_to='posts/', verbose_name='Картинка'),
+        ), 'posts_post', 'image'),
+        migrations.AlterField(
+            model_name='post',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='posts', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='text',
+            field=models.TextField(verbose_name='Текст'),
+        ),
+        IfMissing(migrations.CreateModel(
+            name='Comment',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='posts.Post')),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ), 'posts_comment'),
+        IfMissing(migrations.AddField(
+            model_name='post',
+            name='group',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='posts', to='posts.Group', verbose_name='Группа'),
+        ), 'posts_post', 'group_id'),
+        IfMissing(migrations.CreateModel(
+            name='Follow',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='following', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follower', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'author')},
+            },
+        ), 'posts_follow'),
+    ]
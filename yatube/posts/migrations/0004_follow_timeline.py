@@ -0,0 +1,55 @@
+# Generated by Django 2.2.19 on 2026-10-18 16:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def pull_existing_follows(apps, schema_editor):
+    # У старых подписок лент ещё нет: читаем таких авторов напрямую.
+    Follow = apps.get_model('posts', 'Follow')
+    Follow.objects.update(pull=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0003_post_cursor_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='follow',
+            name='pull',
+            field=models.BooleanField(default=False, help_text='Посты автора не раскладываются по лентам подписчиков, а читаются напрямую при показе ленты.', verbose_name='Читать без ленты подписок'),
+        ),
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='posts.Post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-pub_date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-pub_date'], name='posts_timeline_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', 'author'], name='posts_timeline_user_auth_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='timelineentry',
+            unique_together={('user', 'post')},
+        ),
+        migrations.RunPython(
+            pull_existing_follows, migrations.RunPython.noop
+        ),
+    ]
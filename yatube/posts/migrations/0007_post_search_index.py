@@ -0,0 +1,35 @@
+from django.db import migrations
+
+CREATE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_post_fts "
+    "USING fts5(text, tokenize = 'unicode61')"
+)
+FILL = (
+    "INSERT INTO posts_post_fts (rowid, text) "
+    "SELECT id, text FROM posts_post"
+)
+DROP = "DROP TABLE IF EXISTS posts_post_fts"
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE)
+    schema_editor.execute(FILL)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(DROP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_profile_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
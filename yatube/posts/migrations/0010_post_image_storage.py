@@ -0,0 +1,19 @@
+# Generated by Django 2.2.19 on 2026-10-18 17:15
+
+from django.db import migrations, models
+import posts.images
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_post_comment_count'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=posts.images.ContentAddressedStorage(), upload_to=posts.images.upload_to, verbose_name='Картинка'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.19 on 2026-10-18 17:30
+
+from django.db import migrations, models
+
+from posts import markup
+
+
+def render_html(apps, schema_editor):
+    for name in ('Post', 'Comment'):
+        for _ in markup.backfill(apps.get_model('posts', name)):
+            pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_post_image_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(default='', editable=False, help_text='Строится из текста при сохранении.'),
+        ),
+        migrations.RunPython(render_html, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.19 on 2026-10-18 18:03
+
+from django.db import migrations, models
+
+from posts import timeline
+
+
+def fill_timelines(apps, schema_editor):
+    # Подписки, которые 0004 пометила pull, раскладываются по лентам:
+    # иначе follow_index читал бы все посты всех авторов подписок.
+    for _ in timeline.fill(apps=apps):
+        pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_trending'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='timelineentry',
+            name='posts_timeline_user_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-pub_date', '-post'], name='posts_timeline_user_date_idx'),
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
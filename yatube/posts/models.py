@@ -1,8 +1,21 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from . import images, markup
+
 User = get_user_model()
 
+# Колонки, которые карточки ленты никогда не выводят.
+FEED_DEFERRED_FIELDS = (
+    'author__password',
+    'author__last_login',
+    'author__is_superuser',
+    'author__is_staff',
+    'author__email',
+    'author__date_joined',
+    'group__description',
+)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
@@ -13,9 +26,39 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для ленты: автор и группа одним JOIN."""
+        return self.select_related('author', 'group').defer(
+            *FEED_DEFERRED_FIELDS
+        )
+
+
+class PostManager(models.Manager.from_queryset(PostQuerySet)):
+    """Посты без удалённых, ждущих очистки командой purge_deleted."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
+class CommentManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст')
+    text_html = models.TextField(
+        editable=False,
+        default='',
+        help_text='Строится из текста при сохранении.',
+    )
     pub_date = models.DateTimeField(auto_now_add=True)
+    edited = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+        help_text='Обновляется при каждом сохранении поста.',
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -30,19 +73,70 @@ class Post(models.Model):
         verbose_name='Группа'
     )
     image = models.ImageField(
-        upload_to='posts/',
+        upload_to=images.upload_to,
+        storage=images.storage,
         blank=True,
         verbose_name='Картинка'
     )
+    comment_count = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Комментариев',
+        help_text='Меняется сигналами Comment, сверяется командой recount.',
+    )
+    is_deleted = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Удалён',
+        help_text='Пост скрыт и будет удалён командой purge_deleted.',
+    )
+
+    objects = PostManager()
+    all_objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='posts_post_pub_date_id_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='posts_post_author_date_idx',
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='posts_post_group_date_idx',
+            ),
+            models.Index(fields=['edited'], name='posts_post_edited_idx'),
+            # Частичный индекс: purge_deleted находит удалённые посты,
+            # не просматривая всю таблицу.
+            models.Index(
+                fields=['id'],
+                condition=models.Q(is_deleted=True),
+                name='posts_post_deleted_idx',
+            ),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        self.text_html = markup.render(self.text)
+        # Счётчик комментариев обновляется в базе через F(): при обычном
+        # сохранении поста не перезаписываем его значением из памяти.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'comment_count'
+            ]
+        elif 'text' in (kwargs.get('update_fields') or ()):
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'text_html'}
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -56,10 +150,33 @@ class Comment(models.Model):
         related_name='comments'
     )
     text = models.TextField()
+    text_html = models.TextField(editable=False, default='')
     created = models.DateTimeField(auto_now_add=True)
+    is_deleted = models.BooleanField(default=False, editable=False)
+
+    objects = CommentManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ['-created']
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='posts_comment_post_date_idx',
+            ),
+            models.Index(
+                fields=['created'], name='posts_comment_created_idx'
+            ),
+            models.Index(
+                fields=['id'],
+                condition=models.Q(is_deleted=True),
+                name='posts_comment_deleted_idx',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.text_html = markup.render(self.text)
+        super().save(*args, **kwargs)
 
 
 class Follow(models.Model):
@@ -73,6 +190,129 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following',
     )
+    pull = models.BooleanField(
+        default=False,
+        verbose_name='Читать без ленты подписок',
+        help_text='Посты автора не раскладываются по лентам подписчиков, '
+                  'а читаются напрямую при показе ленты.',
+    )
+    # Пусто у подписок, оформленных до появления поля.
+    created = models.DateTimeField(auto_now_add=True, null=True)
 
     class Meta:
         unique_together = [['user', 'author']]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'],
+                name='posts_follow_author_user_idx',
+            ),
+            models.Index(
+                fields=['created'], name='posts_follow_created_idx'
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-pub_date']
+        unique_together = [['user', 'post']]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='posts_timeline_user_date_idx',
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='posts_timeline_user_auth_idx',
+            ),
+        ]
+
+
+class ProfileStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    post_count = models.IntegerField(default=0, verbose_name='Постов')
+    follower_count = models.IntegerField(
+        default=0, verbose_name='Подписчиков'
+    )
+    following_count = models.IntegerField(default=0, verbose_name='Подписок')
+    comment_count = models.IntegerField(
+        default=0, verbose_name='Комментариев'
+    )
+
+    class Meta:
+        verbose_name = 'Статистика профиля'
+        verbose_name_plural = 'Статистика профилей'
+
+    def __str__(self):
+        return str(self.user_id)
+
+
+class UserDeletion(models.Model):
+    """Пользователь удалён из админки и ждёт очистки purge_deleted."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='deletion',
+    )
+    requested = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Удаление пользователя'
+        verbose_name_plural = 'Удаления пользователей'
+
+    def __str__(self):
+        return str(self.user_id)
+
+
+class TrendingPost(models.Model):
+    """Место поста в списке популярных, его пересчитывает compute_trending."""
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+    )
+    rank = models.PositiveIntegerField(unique=True)
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['rank']
+
+
+class TrendingGroup(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+    )
+    rank = models.PositiveIntegerField(unique=True)
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['rank']
@@ -0,0 +1,166 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+MIN_PK, MAX_PK = -2 ** 63, 2 ** 63 - 1
+
+
+def encode_cursor(*values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Возвращает список значений курсора или None для битого токена."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw.decode())
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+class CursorPaginator:
+    """Keyset-пагинация по паре (ordering, pk) без COUNT и OFFSET.
+
+    Стоимость любой страницы одинакова: запрос идёт по индексу
+    от позиции, зашитой в курсор, и читает per_page + 1 строку.
+    """
+
+    def __init__(self, object_list, per_page, ordering='-pub_date'):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.descending = ordering.startswith('-')
+        self.field_name = ordering.lstrip('-')
+        self.field = object_list.model._meta.get_field(self.field_name)
+
+    def get_page(self, cursor=None):
+        return CursorPage(self, cursor)
+
+    def encode(self, direction, obj):
+        value = self.field.value_to_string(obj)
+        return encode_cursor(direction, value, obj.pk)
+
+    def decode(self, cursor):
+        values = decode_cursor(cursor)
+        if values is None or len(values) != 3:
+            return None
+        direction, value, pk = values
+        if direction not in ('next', 'prev') or not isinstance(value, str):
+            return None
+        # Вне диапазона BIGINT SQLite отвечает OverflowError при запросе.
+        if not isinstance(pk, int) or not MIN_PK <= pk <= MAX_PK:
+            return None
+        try:
+            value = self.field.to_python(value)
+        except (ValidationError, TypeError, ValueError, OverflowError):
+            return None
+        if value is None:
+            return None
+        return direction, value, pk
+
+    def order_by(self, reverse=False):
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        return self.object_list.order_by(
+            prefix + self.field_name, prefix + 'pk'
+        )
+
+    def after(self, value, pk, reverse=False, pk_name='pk'):
+        # (field, pk) > (value, pk) в порядке выдачи. Диапазон по полю
+        # оставлен отдельным условием, чтобы база могла взять его из индекса.
+        descending = self.descending != reverse
+        lookup = 'lte' if descending else 'gte'
+        pk_lookup = 'gte' if descending else 'lte'
+        return (
+            Q(**{f'{self.field_name}__{lookup}': value})
+            & ~Q(**{self.field_name: value, f'{pk_name}__{pk_lookup}': pk})
+        )
+
+    def fetch(self, limit, position=None, reverse=False):
+        """Первые limit объектов в порядке выдачи после (value, pk)."""
+        queryset = self.order_by(reverse)
+        if position is not None:
+            queryset = queryset.filter(self.after(*position, reverse=reverse))
+        return list(queryset[:limit])
+
+
+class CursorPage(Sequence):
+    is_cursor = True
+
+    def __init__(self, paginator, cursor):
+        self.paginator = paginator
+        self.position = paginator.decode(cursor)
+
+    @cached_property
+    def _window(self):
+        paginator = self.paginator
+        limit = paginator.per_page + 1
+        if self.position is None:
+            rows = paginator.fetch(limit)
+            return rows[:paginator.per_page], len(rows) == limit, False
+        direction, value, pk = self.position
+        if direction == 'next':
+            rows = paginator.fetch(limit, (value, pk))
+            return rows[:paginator.per_page], len(rows) == limit, True
+        rows = paginator.fetch(limit, (value, pk), reverse=True)
+        has_previous = len(rows) == limit
+        return rows[:paginator.per_page][::-1], True, has_previous
+
+    @property
+    def object_list(self):
+        return self._window[0]
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self._window[1] and bool(self.object_list)
+
+    def has_previous(self):
+        return self._window[2] and bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if self.has_next():
+            return self.paginator.encode('next', self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous():
+            return self.paginator.encode('prev', self.object_list[0])
+        return None
+
+
+def get_page(request, post_list, per_page=POSTS_PER_PAGE):
+    """Страница ленты для запроса.
+
+    Старые ссылки вида ?page=N обслуживаются обычным Paginator,
+    всё остальное идёт через курсоры ?cursor=<токен>.
+    """
+    page_number = request.GET.get('page')
+    if page_number is not None:
+        return Paginator(post_list, per_page).get_page(page_number)
+    return CursorPaginator(post_list, per_page).get_page(
+        request.GET.get('cursor')
+    )
@@ -0,0 +1,223 @@
+"""Полнотекстовый поиск по постам.
+
+Бэкенд выбирается настройкой POSTS_SEARCH_BACKEND. Локально это индекс
+SQLite FTS5 (таблица posts_post_fts из миграции) с ранжированием bm25;
+на других базах подойдёт DatabaseSearchBackend или свой класс с тем же
+интерфейсом. Индекс обновляется сигналами Post, а полностью
+перестраивается командой manage.py rebuild_search_index.
+"""
+import math
+import re
+
+from django.conf import settings
+from django.db import connections, router
+from django.utils.module_loading import import_string
+
+from .models import Post
+from .paginators import (
+    MAX_PK, MIN_PK, CursorPaginator, decode_cursor, encode_cursor,
+)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class SearchPage:
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, has_previous=False):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = None
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class SearchBackend:
+    def index(self, posts):
+        raise NotImplementedError
+
+    def remove(self, post_ids):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def search(self, query, group=None, author=None, cursor=None,
+               per_page=10):
+        raise NotImplementedError
+
+    def explain(self, query, group=None, author=None, per_page=10):
+        """(SQL, план) запроса первой страницы, для explain_views."""
+        raise NotImplementedError
+
+    def filtered(self, group=None, author=None):
+        posts = Post.objects.all()
+        if group is not None:
+            posts = posts.filter(group=group)
+        if author is not None:
+            posts = posts.filter(author=author)
+        return posts
+
+
+class DatabaseSearchBackend(SearchBackend):
+    """Поиск без отдельного индекса: LIKE по словам, новые посты выше."""
+
+    def index(self, posts):
+        pass
+
+    def remove(self, post_ids):
+        pass
+
+    def clear(self):
+        pass
+
+    def paginator(self, query, group=None, author=None, per_page=10):
+        posts = self.filtered(group, author)
+        for token in TOKEN_RE.findall(query):
+            posts = posts.filter(text__icontains=token)
+        return CursorPaginator(posts.for_feed(), per_page)
+
+    def search(self, query, group=None, author=None, cursor=None,
+               per_page=10):
+        return self.paginator(query, group, author, per_page).get_page(cursor)
+
+    def explain(self, query, group=None, author=None, per_page=10):
+        page = self.paginator(query, group, author, per_page).order_by()[
+            :per_page + 1
+        ]
+        return str(page.query), page.explain()
+
+
+class SQLiteFTSBackend(SearchBackend):
+    table = 'posts_post_fts'
+
+    @staticmethod
+    def match_expression(query):
+        # Каждое слово в кавычках: пользовательский ввод не должен
+        # разбираться как синтаксис запроса FTS5.
+        return ' '.join(f'"{token}"' for token in TOKEN_RE.findall(query))
+
+    @staticmethod
+    def connection(write=False):
+        # Сырой SQL минует роутер баз, поэтому спрашиваем его сами.
+        if write:
+            return connections[router.db_for_write(Post)]
+        return connections[router.db_for_read(Post)]
+
+    @staticmethod
+    def valid_position(score, last_id):
+        # Значения вне диапазонов SQLite уронили бы запрос OverflowError.
+        return (
+            isinstance(score, float) and math.isfinite(score)
+            and isinstance(last_id, int) and not isinstance(last_id, bool)
+            and MIN_PK <= last_id <= MAX_PK
+        )
+
+    def index(self, posts):
+        rows = [(post.pk, post.text) for post in posts]
+        if not rows:
+            return
+        with self.connection(write=True).cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s',
+                [(pk,) for pk, _ in rows],
+            )
+            cursor.executemany(
+                f'INSERT INTO {self.table} (rowid, text) VALUES (%s, %s)',
+                rows,
+            )
+
+    def remove(self, post_ids):
+        with self.connection(write=True).cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s',
+                [(pk,) for pk in post_ids],
+            )
+
+    def clear(self):
+        with self.connection(write=True).cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    def ranked_query(self, expression, group=None, author=None,
+                     position=None, per_page=10):
+        """SQL и параметры выборки (id, score) одной страницы."""
+        # Скрытые посты остаются в индексе до purge_deleted, но не
+        # должны занимать места в LIMIT.
+        conditions = [f'{self.table} MATCH %s', 'NOT post.is_deleted']
+        params = [expression]
+        if group is not None:
+            conditions.append('post.group_id = %s')
+            params.append(group.pk)
+        if author is not None:
+            conditions.append('post.author_id = %s')
+            params.append(author.pk)
+        after = ''
+        if position is not None:
+            score, last_id = position
+            after = 'WHERE score > %s OR (score = %s AND id > %s)'
+            params += [score, score, last_id]
+        sql = (
+            f'SELECT id, score FROM ('
+            f'SELECT {self.table}.rowid AS id, bm25({self.table}) AS score '
+            f'FROM {self.table} '
+            f'JOIN posts_post post ON post.id = {self.table}.rowid '
+            f'WHERE {" AND ".join(conditions)}'
+            f') {after} ORDER BY score, id LIMIT %s'
+        )
+        return sql, params + [per_page + 1]
+
+    def explain(self, query, group=None, author=None, per_page=10):
+        sql, params = self.ranked_query(
+            self.match_expression(query), group, author, per_page=per_page
+        )
+        with self.connection().cursor() as db_cursor:
+            db_cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = db_cursor.fetchall()
+        return sql, '\n'.join(' '.join(map(str, row)) for row in plan)
+
+    def search(self, query, group=None, author=None, cursor=None,
+               per_page=10):
+        expression = self.match_expression(query)
+        if not expression:
+            return SearchPage([])
+        position = decode_cursor(cursor)
+        if not (position and len(position) == 2
+                and self.valid_position(*position)):
+            position = None
+        sql, params = self.ranked_query(
+            expression, group, author, position, per_page
+        )
+        with self.connection().cursor() as db_cursor:
+            db_cursor.execute(sql, params)
+            ranked = db_cursor.fetchall()
+        next_cursor = None
+        if len(ranked) > per_page:
+            ranked = ranked[:per_page]
+            next_cursor = encode_cursor(*ranked[-1][::-1])
+        posts = Post.objects.for_feed().in_bulk([pk for pk, _ in ranked])
+        return SearchPage(
+            [posts[pk] for pk, _ in ranked if pk in posts],
+            next_cursor,
+            has_previous=bool(position),
+        )
+
+
+def get_backend():
+    return import_string(settings.POSTS_SEARCH_BACKEND)()
@@ -0,0 +1,124 @@
+"""Денормализованные счётчики профиля и комментариев поста.
+
+Счётчики меняются F-выражениями из сигналов, поэтому страницы читают
+одну строку ProfileStats (или поле Post.comment_count) вместо COUNT(*)
+по постам, подпискам и комментариям. Скрытые строки (posts.deletion) не
+считаются: при скрытии счётчики затронутых профилей и постов
+пересчитываются, а очистка purge_deleted их уже не меняет. Разошедшиеся
+значения чинит manage.py recount.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, ProfileStats
+
+# Подписки с удалёнными пользователями скрыты, как их посты.
+VISIBLE_FOLLOWS = Follow.objects.filter(
+    user__deletion__isnull=True, author__deletion__isnull=True
+)
+
+COUNTERS = {
+    'post_count': (Post.objects, 'author'),
+    'follower_count': (VISIBLE_FOLLOWS, 'author'),
+    'following_count': (VISIBLE_FOLLOWS, 'user'),
+    'comment_count': (Comment.objects, 'author'),
+}
+
+_paused = threading.local()
+
+
+def count_subquery(rows, field):
+    counted = rows.filter(
+        **{field: OuterRef('pk')}
+    ).order_by().values(field).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def with_counts(users):
+    return users.annotate(**{
+        f'actual_{name}': count_subquery(rows, field)
+        for name, (rows, field) in COUNTERS.items()
+    })
+
+
+def recount(user):
+    user_id = getattr(user, 'pk', user)
+    values = {
+        name: rows.filter(**{field: user_id}).count()
+        for name, (rows, field) in COUNTERS.items()
+    }
+    stats, _ = ProfileStats.objects.update_or_create(
+        user_id=user_id, defaults=values
+    )
+    return stats
+
+
+def for_user(user):
+    stats = ProfileStats.objects.filter(user=user).first()
+    if stats is not None:
+        return stats
+    try:
+        with transaction.atomic():
+            return recount(user)
+    except IntegrityError:
+        return ProfileStats.objects.get(user=user)
+
+
+def refresh(users=None, posts=None):
+    """Пересчитывает счётчики профилей users и постов posts.
+
+    Один UPDATE с подзапросами на таблицу; users и posts -- querysets.
+    """
+    if users is not None:
+        ProfileStats.objects.filter(user__in=users).update(**{
+            name: count_subquery(rows, field)
+            for name, (rows, field) in COUNTERS.items()
+        })
+    if posts is not None:
+        Post.objects.filter(pk__in=posts).update(
+            comment_count=count_subquery(Comment.objects, 'post')
+        )
+
+
+@contextmanager
+def paused():
+    """Сигналы удаления не меняют счётчики внутри блока.
+
+    purge_deleted удаляет только скрытые строки, которые уже не
+    входят в счётчики.
+    """
+    _paused.active = True
+    try:
+        yield
+    finally:
+        _paused.active = False
+
+
+def bump(user_id, counter, delta):
+    if getattr(_paused, 'active', False):
+        return
+    updated = ProfileStats.objects.filter(user_id=user_id).update(
+        **{counter: F(counter) + delta}
+    )
+    # Строки ещё нет: создаём её пересчётом, который уже учитывает
+    # изменение. При удалениях не создаём: пользователь может удаляться.
+    if not updated and delta > 0:
+        for_user(user_id)
+
+
+def bump_comments(post_id, delta):
+    if getattr(_paused, 'active', False):
+        return
+    Post.objects.filter(pk=post_id).update(
+        comment_count=F('comment_count') + delta
+    )
+
+
+def with_comment_counts(posts):
+    return posts.annotate(
+        actual_comment_count=count_subquery(Comment.objects, 'post')
+    )
@@ -0,0 +1,10 @@
+from django import template
+
+from ..thumbnails import thumbnail_for
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(post, geometry):
+    return thumbnail_for(post, geometry)
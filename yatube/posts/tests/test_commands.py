@@ -0,0 +1,190 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import search
+from ..models import Comment, Follow, Group, Post, ProfileStats
+
+User = get_user_model()
+
+
+class ExplainViewsTest(TestCase):
+    def test_feed_queries_use_indexes(self):
+        out = StringIO()
+        call_command('explain_views', stdout=out)
+        plans = out.getvalue()
+        for index in (
+            'posts_post_pub_date_id_idx',
+            'posts_post_author_date_idx',
+            'posts_post_group_date_idx',
+            'posts_comment_post_date_idx',
+            'posts_follow_author_user_idx',
+            'posts_timeline_user_date_idx',
+        ):
+            with self.subTest(index=index):
+                self.assertIn(index, plans)
+
+    def test_covers_comments_search_and_trending(self):
+        out = StringIO()
+        call_command('explain_views', stdout=out)
+        plans = out.getvalue()
+        for name in (
+            'post_comments ?cursor=', 'trending_groups', 'search',
+        ):
+            with self.subTest(name=name):
+                self.assertIn(name, plans)
+        self.assertIn('posts_post_fts', plans)
+        self.assertIn('posts_trendingpost USING COVERING INDEX', plans)
+
+
+class RecountTest(TestCase):
+    def test_recount_repairs_drift(self):
+        user = User.objects.create_user(username='author')
+        Post.objects.create(author=user, text='Пост')
+        ProfileStats.objects.filter(user=user).update(post_count=42)
+        out = StringIO()
+        call_command('recount', stdout=out)
+        self.assertEqual(ProfileStats.objects.get(user=user).post_count, 1)
+        self.assertIn('исправлено: 1', out.getvalue())
+
+    def test_recount_repairs_comment_count(self):
+        user = User.objects.create_user(username='author')
+        post = Post.objects.create(author=user, text='Пост')
+        Post.objects.filter(pk=post.pk).update(comment_count=7)
+        out = StringIO()
+        call_command('recount', stdout=out)
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+        self.assertIn('Проверено постов: 1, исправлено: 1', out.getvalue())
+
+
+class RebuildSearchIndexTest(TestCase):
+    def test_rebuild_restores_index(self):
+        user = User.objects.create_user(username='author')
+        post = Post.objects.create(author=user, text='Поисковый пост')
+        backend = search.get_backend()
+        backend.clear()
+        self.assertEqual(list(backend.search('поисковый')), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(list(backend.search('поисковый')), [post])
+
+
+class RenderTextHtmlTest(TestCase):
+    def test_backfills_missing_and_rerenders_all(self):
+        user = User.objects.create_user(username='author')
+        post = Post.objects.create(author=user, text='www.example.com')
+        comment = Comment.objects.create(post=post, author=user, text='Да')
+        Post.objects.update(text_html='')
+        Comment.objects.update(text_html='')
+        call_command('render_text_html', stdout=StringIO())
+        post.refresh_from_db()
+        comment.refresh_from_db()
+        self.assertEqual(post.text_html, '<p>www.example.com</p>')
+        self.assertEqual(comment.text_html, '<p>Да</p>')
+        with override_settings(POSTS_MARKUP_RENDERER='posts.markup.linkify'):
+            call_command('render_text_html', stdout=StringIO())
+            post.refresh_from_db()
+            self.assertNotIn('<a', post.text_html)
+            call_command('render_text_html', '--all', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertIn('<a href="http://www.example.com"', post.text_html)
+
+
+class TransferTest(TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'dump.jsonl.gz')
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.path))
+
+    def test_round_trip_remaps_users_and_keeps_dates(self):
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        post = Post.objects.create(author=author, group=group, text='Пост')
+        Comment.objects.create(post=post, author=reader, text='Ответ')
+        Follow.objects.create(user=reader, author=author)
+        old_date = timezone.now() - timedelta(days=30)
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=old_date, edited=old_date)
+        call_command('export_posts', self.path, stdout=StringIO())
+
+        Post.objects.all().delete()
+        Group.objects.all().delete()
+        author.delete()
+        # Такой же username в новой базе получает другой id.
+        User.objects.create_user(username='placeholder')
+        reader_id = reader.pk
+        out = StringIO()
+        call_command('import_posts', self.path, stdout=out)
+
+        author = User.objects.get(username='author')
+        imported = Post.objects.get(pk=post.pk)
+        self.assertNotEqual(author.pk, post.author_id)
+        self.assertEqual(imported.author, author)
+        self.assertEqual(imported.group.slug, 'group')
+        self.assertEqual(imported.pub_date, old_date)
+        self.assertEqual(imported.text_html, '<p>Пост</p>')
+        self.assertEqual(imported.comment_count, 1)
+        self.assertEqual(imported.comments.get().author_id, reader_id)
+        self.assertEqual(imported.comments.get().text_html, '<p>Ответ</p>')
+        self.assertTrue(Follow.objects.filter(
+            user_id=reader_id, author=author, pull=True).exists())
+        self.assertEqual(
+            list(search.get_backend().search('пост')), [imported])
+        self.assertIn('строк/с', out.getvalue())
+
+    def test_id_offset(self):
+        author = User.objects.create_user(username='author')
+        post = Post.objects.create(author=author, text='Пост')
+        call_command('export_posts', self.path, stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('import_posts', self.path, stdout=StringIO())
+        call_command(
+            'import_posts', self.path, id_offset=100, stdout=StringIO())
+        self.assertEqual(
+            Post.objects.get(pk=post.pk + 100).text, post.text)
+
+    def test_orphans_and_duplicates_are_skipped(self):
+        path = os.path.join(os.path.dirname(self.path), 'dump.jsonl')
+        records = [
+            {'type': 'user', 'username': 'author'},
+            {'type': 'user', 'username': 'reader'},
+            {'type': 'post', 'id': 1, 'author': 'ghost', 'group': None,
+             'text': 'Сирота', 'pub_date': '2021-01-01T00:00:00+00:00'},
+            {'type': 'post', 'id': 2, 'author': 'author', 'group': None,
+             'text': 'Пост', 'pub_date': '2021-01-01T00:00:00+00:00'},
+            {'type': 'comment', 'post': 1, 'author': 'reader',
+             'text': 'Сироте', 'created': '2021-01-02T00:00:00+00:00'},
+            {'type': 'comment', 'post': 2, 'author': 'reader',
+             'text': 'Ответ', 'created': '2021-01-02T00:00:00+00:00'},
+            {'type': 'follow', 'user': 'reader', 'author': 'author'},
+            {'type': 'follow', 'user': 'reader', 'author': 'author'},
+        ]
+        with open(path, 'w', encoding='utf-8') as stream:
+            for record in records:
+                stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        out = StringIO()
+        call_command('import_posts', path, stdout=out)
+        self.assertEqual(list(Post.objects.values_list('pk', flat=True)), [2])
+        self.assertEqual(Comment.objects.get().text, 'Ответ')
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertIn('пропущено: 3', out.getvalue())
+        self.assertIn('follow: 1)', out.getvalue())
+
+    def test_export_skips_comments_of_hidden_posts(self):
+        author = User.objects.create_user(username='author')
+        post = Post.objects.create(author=author, text='Пост')
+        Comment.objects.create(post=post, author=author, text='Ответ')
+        Post.objects.filter(pk=post.pk).update(is_deleted=True)
+        call_command('export_posts', self.path, stdout=StringIO())
+        Post.all_objects.all().delete()
+        call_command('import_posts', self.path, stdout=StringIO())
+        self.assertFalse(Comment.all_objects.exists())
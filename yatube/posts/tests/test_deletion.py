@@ -0,0 +1,110 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import deletion
+from ..models import (
+    Comment, Follow, Post, ProfileStats, TimelineEntry, UserDeletion,
+)
+
+User = get_user_model()
+
+
+class SoftDeleteTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.other = Post.objects.create(author=self.reader, text='Другой')
+        Comment.objects.create(
+            post=self.other, author=self.author, text='Ответ'
+        )
+
+    def test_deleted_post_is_hidden_at_once(self):
+        self.client.get(reverse('posts:index'))
+        deletion.delete_posts(Post.objects.filter(pk=self.post.pk))
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(list(response.context['page_obj']), [self.other])
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(Post.all_objects.filter(pk=self.post.pk).exists())
+
+    def test_deleted_user_content_is_hidden(self):
+        deletion.delete_users(User.objects.filter(pk=self.author.pk))
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        self.assertEqual(list(Post.objects.all()), [self.other])
+        self.assertFalse(self.other.comments.exists())
+        response = self.client.get(
+            reverse('posts:profile', args=['author'])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_counters_drop_when_hidden(self):
+        Comment.objects.create(post=self.post, author=self.reader, text='Да')
+        response = self.client.get(reverse('posts:profile', args=['author']))
+        self.assertEqual(response.context['stats'].post_count, 1)
+        deletion.delete_posts(Post.objects.filter(pk=self.post.pk))
+        response = self.client.get(reverse('posts:profile', args=['author']))
+        self.assertEqual(response.context['stats'].post_count, 0)
+        self.assertEqual(ProfileStats.objects.get(
+            user=self.reader).comment_count, 0)
+
+        deletion.delete_users(User.objects.filter(pk=self.author.pk))
+        stats = ProfileStats.objects.get(user=self.reader)
+        self.assertEqual(stats.following_count, 0)
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.comment_count, 0)
+        call_command('purge_deleted', stdout=StringIO())
+        stats.refresh_from_db()
+        self.assertEqual(
+            (stats.post_count, stats.following_count, stats.comment_count),
+            (1, 0, 0),
+        )
+
+    def test_purge_deletes_in_chunks(self):
+        for number in range(4):
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+        deletion.delete_users(User.objects.filter(pk=self.author.pk))
+        out = StringIO()
+        call_command('purge_deleted', '--chunk-size', '2', stdout=out)
+        self.assertIn('Посты: 5 из 5', out.getvalue())
+        self.assertIn('Посты: 4 из 5', out.getvalue())
+        self.assertFalse(User.objects.filter(username='author').exists())
+        self.assertFalse(Post.all_objects.filter(author=self.author.pk))
+        self.assertFalse(Comment.all_objects.exists())
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(UserDeletion.objects.exists())
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.comment_count, 0)
+        stats = ProfileStats.objects.get(user=self.reader)
+        self.assertEqual(stats.following_count, 0)
+
+    def test_admin_delete_only_hides(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        response = self.client.post(
+            reverse('admin:posts_post_changelist'),
+            {
+                'action': 'delete_selected',
+                '_selected_action': [self.post.pk],
+                'post': 'yes',
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Post.all_objects.get(pk=self.post.pk).is_deleted)
+        url = reverse('admin:auth_user_delete', args=[self.author.pk])
+        self.assertContains(self.client.get(url), 'author')
+        self.client.post(url, {'post': 'yes'})
+        self.assertTrue(UserDeletion.objects.filter(user=self.author).exists())
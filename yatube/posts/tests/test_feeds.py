@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class FeedsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='writer')
+        cls.group = Group.objects.create(
+            title='Кошки', slug='cats', description='Всё о кошках'
+        )
+        Post.objects.create(
+            author=cls.author, group=cls.group, text='Кот спит на окне'
+        )
+        Post.objects.create(author=cls.author, text='Пост без группы')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds(self):
+        cases = (
+            (reverse('posts:site_rss'), 'application/rss+xml', 2),
+            (reverse('posts:site_atom'), 'application/atom+xml', 2),
+            (reverse('posts:group_rss', args=['cats']),
+             'application/rss+xml', 1),
+            (reverse('posts:author_atom', args=['writer']),
+             'application/atom+xml', 2),
+        )
+        for url, content_type, count in cases:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response['Content-Type'].startswith(
+                    content_type
+                ))
+                self.assertContains(response, 'Кот спит на окне')
+                items = response.content.count(b'<item>')
+                entries = response.content.count(b'<entry>')
+                self.assertEqual(items + entries, count)
+
+    def test_missing_scope_is_404(self):
+        for url in (
+            reverse('posts:group_rss', args=['dogs']),
+            reverse('posts:author_atom', args=['nobody']),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_cached_until_scope_changes(self):
+        url = reverse('posts:group_atom', args=['cats'])
+        response = self.client.get(url)
+        # Повтор: только поиск группы по slug, сама лента из кэша.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).content, response.content)
+        with self.assertNumQueries(1):
+            not_modified = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(not_modified.status_code, 304)
+
+        Post.objects.create(
+            author=self.author, group=self.group, text='Новый кот'
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новый кот')
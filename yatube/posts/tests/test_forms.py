@@ -1,9 +1,25 @@
+import io
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
+from PIL import Image
 from ..models import Post
 
 User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(size, mode='RGB', fmt='JPEG', **options):
+    buffer = io.BytesIO()
+    Image.new(mode, size, 'red').save(buffer, fmt, **options)
+    return buffer.getvalue()
 
 
 class CreateFormTests(TestCase):
@@ -13,6 +29,7 @@ class CreateFormTests(TestCase):
         cls.user = User.objects.create_user(username='NoName')
 
     def setUp(self):
+        cache.clear()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
 
@@ -33,6 +50,18 @@ class CreateFormTests(TestCase):
         self.assertEqual(post.text, form_data['text'])
         self.assertEqual(post.author, self.user, 'Author')
 
+    def test_invalid_post_is_shown_with_errors(self):
+        response = self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Черновик', 'group': 999},
+        )
+        self.assertEqual(response.status_code, 200)
+        form = response.context['form']
+        self.assertTrue(form.is_bound)
+        self.assertIn('group', form.errors)
+        self.assertContains(response, 'Черновик')
+        self.assertFalse(Post.objects.exists())
+
     def test_change_post(self):
         form_data_new = {
             'text': 'Изменили текст'
@@ -63,3 +92,67 @@ class CreateFormTests(TestCase):
             data=form_comment
         )
         self.assertEqual(post.comments.last().text, text_comment)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='photographer')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def upload(self, content, name='photo.jpg'):
+        return self.client.post(reverse('posts:post_create'), data={
+            'text': 'С картинкой',
+            'image': SimpleUploadedFile(name, content, 'image/jpeg'),
+        })
+
+    def test_image_is_downscaled_and_stripped(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Снято с поворотом на 90 градусов.
+        exif[0x010F] = 'Camera'
+        self.upload(make_image((4000, 1000), exif=exif.tobytes()))
+        post = Post.objects.get()
+        self.assertRegex(
+            post.image.name, r'^posts/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$'
+        )
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (480, settings.POST_IMAGE_MAX_SIDE))
+            self.assertFalse(image.getexif())
+
+    def test_transparent_image_stays_png(self):
+        self.upload(make_image((10, 10), 'RGBA', 'PNG'), 'logo.png')
+        self.assertTrue(Post.objects.get().image.name.endswith('.png'))
+
+    def test_identical_images_are_stored_once(self):
+        content = make_image((100, 100))
+        self.upload(content, 'first.jpg')
+        self.upload(content, 'second.jpg')
+        first, second = Post.objects.order_by('pk')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(
+            os.listdir(os.path.dirname(first.image.path)),
+            [os.path.basename(first.image.name)],
+        )
+
+    def test_limits(self):
+        cases = (
+            ({'POST_IMAGE_MAX_UPLOAD_SIZE': 100}, 'Файл больше'),
+            ({'POST_IMAGE_MAX_PIXELS': 99}, 'мегапикселей'),
+        )
+        for limits, error in cases:
+            with self.subTest(limits=limits), override_settings(**limits):
+                response = self.upload(make_image((10, 10)))
+                errors = response.context['form'].errors['image']
+                self.assertIn(error, errors[0])
+        self.assertFalse(Post.objects.exists())
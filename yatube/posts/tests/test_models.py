@@ -1,7 +1,7 @@
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-from ..models import Group, Post
+from ..models import Comment, Follow, Group, Post, ProfileStats
 
 User = get_user_model()
 
@@ -22,6 +22,38 @@ class PostModelTest(TestCase):
         self.assertEqual(text_post, post.text[:15])
 
 
+class TextHtmlTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='writer')
+
+    def test_html_is_rendered_on_save(self):
+        post = Post.objects.create(author=self.user, text='<b>раз</b>\nдва')
+        self.assertEqual(
+            post.text_html, '<p>&lt;b&gt;раз&lt;/b&gt;<br>два</p>'
+        )
+        post.text = 'три'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, '<p>три</p>')
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='ответ'
+        )
+        self.assertEqual(comment.text_html, '<p>ответ</p>')
+
+    @override_settings(POSTS_MARKUP_RENDERER='posts.markup.linkify')
+    def test_linkify_renderer(self):
+        post = Post.objects.create(
+            author=self.user, text='см. https://example.com <script>'
+        )
+        self.assertEqual(
+            post.text_html,
+            '<p>см. <a href="https://example.com" rel="nofollow">'
+            'https://example.com</a> &lt;script&gt;</p>',
+        )
+
+
 class TestGroup(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -37,3 +69,26 @@ class TestGroup(TestCase):
         task_group = self.group
         title_group = task_group.title
         self.assertEqual(title_group, task_group.title)
+
+
+class ProfileStatsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def counters(self, user):
+        stats = ProfileStats.objects.get(user=user)
+        return (stats.post_count, stats.follower_count,
+                stats.following_count, stats.comment_count)
+
+    def test_counters_follow_writes(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(post=post, author=self.reader, text='Ответ')
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.counters(self.author), (1, 1, 0, 0))
+        self.assertEqual(self.counters(self.reader), (0, 0, 1, 1))
+        follow.delete()
+        post.delete()
+        self.assertEqual(self.counters(self.author), (0, 0, 0, 0))
+        self.assertEqual(self.counters(self.reader), (0, 0, 0, 0))
@@ -0,0 +1,80 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import trending
+from ..models import Comment, Follow, Group, Post, TrendingGroup
+
+User = get_user_model()
+
+
+class TrendingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.quiet = Post.objects.create(author=self.author, text='Тихий')
+        self.old = Post.objects.create(author=self.author, text='Старый')
+        self.hot = Post.objects.create(
+            author=self.author, group=self.group, text='Горячий'
+        )
+        now = timezone.now()
+        for post, count, age in (
+            (self.old, 3, timedelta(hours=30)),
+            (self.hot, 2, timedelta(minutes=5)),
+            (self.quiet, 5, timedelta(days=5)),
+        ):
+            for _ in range(count):
+                comment = Comment.objects.create(
+                    post=post, author=self.reader, text='Ответ'
+                )
+                Comment.objects.filter(pk=comment.pk).update(
+                    created=now - age
+                )
+
+    def test_recent_comments_weigh_more(self):
+        posts, groups = trending.scores()
+        self.assertGreater(posts[self.hot.pk], posts[self.old.pk])
+        # Комментарии старше окна не считаются.
+        self.assertNotIn(self.quiet.pk, posts)
+        self.assertEqual(groups[self.group.pk], posts[self.hot.pk])
+
+    def test_new_followers_boost_recent_posts(self):
+        before, _ = trending.scores()
+        Follow.objects.create(user=self.reader, author=self.author)
+        after, _ = trending.scores()
+        self.assertGreater(after[self.old.pk], before[self.old.pk])
+        self.assertIn(self.quiet.pk, after)
+
+    def test_aggregates_read_only_the_window(self):
+        since = timezone.now() - timedelta(hours=1)
+        for queryset, field, index in (
+            (Comment.objects, 'post', 'posts_comment_created_idx'),
+            (Follow.objects, 'author', 'posts_follow_created_idx'),
+        ):
+            with self.subTest(index=index):
+                plan = trending.hourly(
+                    queryset.filter(created__gte=since), field
+                ).explain()
+                self.assertIn(index, plan)
+
+    def test_pages_read_stored_lists(self):
+        out = StringIO()
+        call_command('compute_trending', stdout=out)
+        self.assertIn('Популярных постов: 2, групп: 1', out.getvalue())
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(list(response.context['posts']), [self.hot, self.old])
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('posts:trending_groups'))
+        self.assertContains(response, 'Группа')
+        self.assertEqual(TrendingGroup.objects.get().rank, 1)
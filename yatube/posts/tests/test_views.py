@@ -1,12 +1,20 @@
 from django.contrib.auth import get_user_model
 from django.test import TestCase, Client, override_settings
 from django.urls import reverse
-from ..models import Post, Group, Comment, Follow
+from .. import deletion, search, thumbnails, timeline
+from ..paginators import encode_cursor
+from ..models import Post, Group, Comment, Follow, TimelineEntry
 from django import forms
 from django.core.files.uploadedfile import SimpleUploadedFile
 import shutil
 import tempfile
+from unittest import mock
 from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from io import StringIO
 
 User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -21,7 +29,7 @@ small_gif = (
 )
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
 class PagesTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -198,3 +206,539 @@ class PaginatorViewsTest(TestCase):
             response = self.client.get(adress)
             amount = len(response.context['page_obj'])
             self.assertEqual(amount, count)
+
+    def test_cursor_pages(self):
+        address = reverse('posts:group_list', kwargs={'slug': self.slug})
+        first = self.client.get(address).context['page_obj']
+        self.assertTrue(first.has_next())
+        self.assertFalse(first.has_previous())
+        second = self.client.get(
+            address, {'cursor': first.next_cursor}).context['page_obj']
+        self.assertEqual(len(second), 3)
+        self.assertFalse(second.has_next())
+        self.assertFalse(set(first) & set(second))
+        back = self.client.get(
+            address, {'cursor': second.previous_cursor}).context['page_obj']
+        self.assertEqual(list(back), list(first))
+
+    def test_broken_cursor_opens_first_page(self):
+        response = self.client.get(reverse('posts:index'), {'cursor': '%%'})
+        self.assertEqual(len(response.context['page_obj']), 10)
+
+    def test_malformed_cursor_values_open_first_page(self):
+        for cursor in (
+            encode_cursor('next', ['2020-01-01'], 1),
+            encode_cursor('next', '2020-01-01T00:00:00+00:00', 10 ** 30),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    reverse('posts:index'), {'cursor': cursor}
+                )
+                self.assertEqual(len(response.context['page_obj']), 10)
+
+
+class FeedQueriesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        for i in range(10):
+            author = User.objects.create_user(username=f'author{i}')
+            group = Group.objects.create(
+                title=f'Группа {i}',
+                slug=f'group{i}',
+                description='Тестовое описание',
+            )
+            post = Post.objects.create(
+                author=author,
+                text='Тестовый пост',
+                group=group,
+            )
+            Comment.objects.create(post=post, author=author, text='Ответ')
+            Follow.objects.create(user=cls.reader, author=author)
+        cls.author = author
+        cls.group = group
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_feed_query_budget(self):
+        # Кэш пуст: к основным запросам добавляется расчёт Last-Modified,
+        # а у группы и профиля ещё и поиск области условного GET.
+        budgets = {
+            reverse('posts:index'): 2,
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}): 4,
+            reverse('posts:profile',
+                    kwargs={'username': self.author.username}): 5,
+        }
+        for address, queries in budgets.items():
+            with self.subTest(address=address):
+                with self.assertNumQueries(queries):
+                    self.client.get(address)
+
+    def test_follow_feed_query_budget(self):
+        # Записи ленты и посты авторов с pull читаются раздельно по своим
+        # индексам, посты страницы — третьим запросом.
+        with self.assertNumQueries(6):
+            response = self.authorized_client.get(
+                reverse('posts:follow_index'))
+        self.assertEqual(len(response.context['page_obj']), 10)
+        self.assertEqual(response.context['page_obj'][0].comment_count, 1)
+
+    def test_follow_buttons_use_one_query(self):
+        with self.assertNumQueries(5):
+            response = self.authorized_client.get(reverse('posts:index'))
+        following_map = response.context['following_map']
+        self.assertEqual(len(following_map), 10)
+        self.assertTrue(all(following_map.values()))
+        self.assertContains(response, 'Отписаться', count=10)
+
+    def test_profile_follow_state(self):
+        address = reverse(
+            'posts:profile', kwargs={'username': self.author.username})
+        response = self.authorized_client.get(address)
+        self.assertTrue(response.context['following'])
+        Follow.objects.filter(user=self.reader, author=self.author).delete()
+        response = self.authorized_client.get(address)
+        self.assertFalse(response.context['following'])
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.old_post = Post.objects.create(author=cls.author, text='Старый')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def follow(self):
+        self.authorized_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author.username}
+        ))
+
+    def feed(self):
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_and_create_fans_out(self):
+        self.follow()
+        self.assertEqual(self.feed(), [self.old_post])
+        self.author_client.post(
+            reverse('posts:post_create'), data={'text': 'Новый'})
+        new_post = Post.objects.get(text='Новый')
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=new_post).exists())
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+
+    def test_unfollow_prunes_timeline(self):
+        self.follow()
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.author.username}
+        ))
+        self.assertFalse(self.reader.timeline.exists())
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(TIMELINE_SIZE=1)
+    def test_timeline_is_bounded(self):
+        self.follow()
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        # Раскладка не обрезает ленты, это делает trim_timelines.
+        self.assertEqual(self.reader.timeline.count(), 2)
+        out = StringIO()
+        call_command('trim_timelines', stdout=out)
+        self.assertIn('Обрезано лент: 1', out.getvalue())
+        self.assertEqual(
+            list(self.reader.timeline.values_list('post', flat=True)),
+            [new_post.pk],
+        )
+
+    def test_fan_out_queries_do_not_grow_with_followers(self):
+        def queries_for_new_post():
+            with CaptureQueriesContext(connection) as queries:
+                Post.objects.create(author=self.author, text='Новый')
+            return len(queries)
+
+        self.follow()
+        few = queries_for_new_post()
+        for number in range(20):
+            Follow.objects.create(
+                user=User.objects.create_user(username=f'fan{number}'),
+                author=self.author,
+            )
+        self.assertEqual(queries_for_new_post(), few)
+
+    def test_fill_timelines_moves_pull_follows_to_push(self):
+        celebrity = User.objects.create_user(username='celebrity')
+        Follow.objects.create(user=self.author, author=celebrity)
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=celebrity)
+        Follow.objects.update(pull=True)
+        TimelineEntry.objects.all().delete()
+        with override_settings(TIMELINE_FANOUT_LIMIT=1):
+            call_command('fill_timelines', stdout=StringIO())
+        self.assertEqual(
+            set(Follow.objects.filter(pull=True).values_list(
+                'author__username', flat=True
+            )),
+            {'celebrity'},
+        )
+        self.assertEqual(
+            list(self.reader.timeline.values_list('post', flat=True)),
+            [self.old_post.pk],
+        )
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_is_pulled(self):
+        self.follow()
+        self.assertTrue(Follow.objects.get(user=self.reader).pull)
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        self.assertFalse(self.reader.timeline.exists())
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+
+
+class TimelinePaginatorTest(TestCase):
+    def test_merges_timeline_and_pulled_authors(self):
+        reader = User.objects.create_user(username='reader')
+        pushed = User.objects.create_user(username='pushed')
+        pulled = User.objects.create_user(username='pulled')
+        Follow.objects.create(user=reader, author=pushed)
+        Follow.objects.create(user=reader, author=pulled, pull=True)
+        posts = [
+            Post.objects.create(author=author, text=str(number))
+            for number, author in enumerate([pushed, pulled] * 3)
+        ][::-1]
+        pages, cursor = [], None
+        while True:
+            page = timeline.get_page(reader, cursor, per_page=2)
+            pages.append(list(page))
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(pages, [posts[0:2], posts[2:4], posts[4:6]])
+        back = timeline.get_page(reader, page.previous_cursor, per_page=2)
+        self.assertEqual(list(back), posts[2:4])
+
+
+class FeedCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Первый пост', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_page_skips_queries(self):
+        self.client.get(reverse('posts:index'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Первый пост')
+
+    def test_writes_invalidate_pages(self):
+        addresses = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+        ]
+        for address in addresses:
+            self.client.get(address)
+        Post.objects.create(author=self.user, text='Свежий', group=self.group)
+        Comment.objects.create(post=self.post, author=self.user, text='Ок')
+        for address in addresses:
+            with self.subTest(address=address):
+                response = self.client.get(address)
+                self.assertContains(response, 'Свежий')
+                self.assertContains(response, 'Комментариев: 1')
+
+    def test_page_key_varies_by_position_and_viewer(self):
+        for i in range(10):
+            Post.objects.create(author=self.user, text=f'Пост {i}')
+        first = self.client.get(reverse('posts:index'))
+        second = self.client.get(
+            reverse('posts:index'),
+            {'cursor': first.context['page_obj'].next_cursor})
+        self.assertContains(second, 'Первый пост')
+        self.assertNotContains(first, 'Первый пост')
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotEqual(response.context['feed_cache_key'],
+                            first.context['feed_cache_key'])
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=2)
+class ThumbnailPipelineTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='С картинкой',
+            image=SimpleUploadedFile(
+                name='pipeline.gif',
+                content=small_gif,
+                content_type='image/gif'
+            ),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_placeholder_until_thumbnail_is_ready(self):
+        address = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk})
+        with mock.patch('posts.thumbnails._get_executor') as executor:
+            response = self.client.get(address)
+        self.assertContains(response, 'img/placeholder.svg')
+        executor.return_value.submit.assert_called_once()
+        thumbnails._pending.clear()
+
+        thumbnails.generate(self.post.pk)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'img/placeholder.svg')
+        self.assertContains(response, 'cache/')
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Кошки', slug='cats', description='Про кошек')
+        cls.exact = Post.objects.create(
+            author=cls.user, group=cls.group, text='кошка кошка кошка')
+        cls.loose = Post.objects.create(
+            author=cls.other,
+            text='длинный текст про собаку, где кошка упомянута один раз',
+        )
+        Post.objects.create(author=cls.user, text='совсем про другое')
+
+    def search(self, **params):
+        return self.client.get(reverse('posts:search_api'), params).json()
+
+    def test_results_are_ranked(self):
+        ids = [post['id'] for post in self.search(q='кошка')['results']]
+        self.assertEqual(ids, [self.exact.pk, self.loose.pk])
+
+    def test_filters(self):
+        for params, expected in (
+            ({'group': 'cats'}, [self.exact.pk]),
+            ({'author': 'other'}, [self.loose.pk]),
+        ):
+            with self.subTest(params=params):
+                results = self.search(q='кошка', **params)['results']
+                self.assertEqual([post['id'] for post in results], expected)
+
+    def test_cursor_pages(self):
+        for number in range(12):
+            Post.objects.create(author=self.user, text=f'кошка {number}')
+        first = self.search(q='кошка')
+        self.assertEqual(len(first['results']), 10)
+        second = self.client.get(first['next']).json()
+        self.assertEqual(len(second['results']), 4)
+        self.assertIsNone(second['next'])
+        seen = {post['id'] for post in first['results'] + second['results']}
+        self.assertEqual(len(seen), 14)
+
+    def test_index_follows_post_changes(self):
+        exact = Post.objects.get(pk=self.exact.pk)
+        exact.text = 'теперь про собак'
+        exact.save()
+        self.assertEqual(
+            [post['id'] for post in self.search(q='кошка')['results']],
+            [self.loose.pk],
+        )
+        Post.objects.get(pk=self.loose.pk).delete()
+        self.assertEqual(self.search(q='кошка')['results'], [])
+
+    def test_hidden_posts_do_not_take_page_slots(self):
+        hidden = [
+            Post.objects.create(author=self.user, text=f'кошка {number}')
+            for number in range(2)
+        ]
+        deletion.delete_posts(
+            Post.objects.filter(pk__in=[post.pk for post in hidden]))
+        page = search.get_backend().search('кошка', per_page=2)
+        self.assertEqual(list(page), [self.exact, self.loose])
+        self.assertFalse(page.has_next())
+
+    def test_out_of_range_cursor_opens_first_page(self):
+        for cursor in (
+            encode_cursor(1.0, 10 ** 30),
+            encode_cursor(10 ** 30, 1),
+            encode_cursor(1e308 * 10, 1),
+            encode_cursor(True, True),
+        ):
+            with self.subTest(cursor=cursor):
+                for name in ('posts:search', 'posts:search_api'):
+                    response = self.client.get(
+                        reverse(name), {'q': 'кошка', 'cursor': cursor})
+                    self.assertEqual(response.status_code, 200)
+                results = self.search(q='кошка', cursor=cursor)['results']
+                self.assertEqual(
+                    [post['id'] for post in results],
+                    [self.exact.pk, self.loose.pk],
+                )
+
+    def test_query_syntax_is_not_interpreted(self):
+        response = self.client.get(
+            reverse('posts:search'), {'q': 'кошка" OR NEAR(*'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_search_page(self):
+        response = self.client.get(reverse('posts:search'), {'q': 'кошка'})
+        self.assertEqual(
+            list(response.context['page_obj']), [self.exact, self.loose])
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.addresses = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+
+    def validators(self, address, client=None):
+        response = (client or self.client).get(address)
+        return {
+            'HTTP_IF_NONE_MATCH': response['ETag'],
+            'HTTP_IF_MODIFIED_SINCE': response['Last-Modified'],
+        }
+
+    def test_unchanged_pages_return_304(self):
+        for address in self.addresses:
+            with self.subTest(address=address):
+                validators = self.validators(address)
+                response = self.client.get(address, **validators)
+                self.assertEqual(response.status_code, 304)
+                del validators['HTTP_IF_NONE_MATCH']
+                response = self.client.get(address, **validators)
+                self.assertEqual(response.status_code, 304)
+
+    def test_304_skips_main_queries(self):
+        validators = self.validators(reverse('posts:index'))
+        with self.assertNumQueries(0):
+            self.client.get(reverse('posts:index'), **validators)
+
+    def test_changes_return_fresh_page(self):
+        validators = {
+            address: self.validators(address) for address in self.addresses
+        }
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленный пост'
+        post.save()
+        for address in self.addresses:
+            with self.subTest(address=address):
+                response = self.client.get(address, **validators[address])
+                self.assertEqual(response.status_code, 200)
+
+    def test_comment_and_delete_refresh_pages(self):
+        address = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk})
+        validators = self.validators(address)
+        Comment.objects.create(post=self.post, author=self.user, text='К')
+        response = self.client.get(address, **validators)
+        self.assertEqual(response.status_code, 200)
+
+        address = reverse('posts:index')
+        extra = Post.objects.create(author=self.user, text='Второй')
+        validators = self.validators(address)
+        extra.delete()
+        response = self.client.get(address, **validators)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_viewer(self):
+        address = reverse('posts:index')
+        validators = self.validators(address)
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(
+            address, HTTP_IF_NONE_MATCH=validators['HTTP_IF_NONE_MATCH'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_objects_still_404(self):
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': 'missing'}))
+        self.assertEqual(response.status_code, 404)
+
+
+class CommentPagesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        for number in range(25):
+            commenter = User.objects.create_user(username=f'reader{number}')
+            Comment.objects.create(
+                post=cls.post, author=commenter, text=f'Комментарий {number}')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_first_page_inline(self):
+        address = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk})
+        with self.assertNumQueries(5):
+            response = self.client.get(address)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), 20)
+        self.assertEqual(comments[0].text, 'Комментарий 24')
+        self.assertTrue(comments.has_next())
+        self.assertContains(response, 'Комментариев: 25')
+
+    def test_fragment_returns_next_page(self):
+        address = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk})
+        cursor = self.client.get(address).context['comments'].next_cursor
+        response = self.client.get(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk}),
+            {'cursor': cursor},
+        )
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            [f'Комментарий {number}' for number in range(4, -1, -1)],
+        )
+        self.assertNotContains(response, 'Показать ещё')
+        self.assertNotContains(response, '<html')
+
+    def test_stored_count_follows_comments(self):
+        post = Post.objects.get(pk=self.post.pk)
+        Comment.objects.create(post=post, author=self.user, text='Ещё')
+        post.text = 'Исправленный пост'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 26)
+        post.comments.first().delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 25)
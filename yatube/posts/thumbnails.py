@@ -0,0 +1,106 @@
+"""Фоновая подготовка миниатюр картинок постов.
+
+После сохранения поста с картинкой все размеры из POST_THUMBNAIL_SIZES
+строятся в пуле потоков, а шаблоны до этого показывают заглушку вместо
+того, чтобы декодировать и масштабировать оригинал прямо в запросе.
+При THUMBNAIL_WORKERS = 0 миниатюры строятся сразу, как раньше.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from . import caching
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+_pending = set()
+
+
+def cached_thumbnail(file_, geometry, **options):
+    """Готовая миниатюра из хранилища ключей sorl или None.
+
+    Повторяет вычисление имени из ThumbnailBackend.get_thumbnail,
+    но никогда не строит миниатюру сама.
+    """
+    backend = default.backend
+    source = ImageFile(file_)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, geometry, options)
+    return default.kvstore.get(ImageFile(name, default.storage))
+
+
+def generate(post_id):
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'author_id', 'group_id'
+    ).first()
+    if post is None or not post.image:
+        return
+    for geometry, options in settings.POST_THUMBNAIL_SIZES.items():
+        get_thumbnail(post.image, geometry, **options)
+    # Карточки с заглушкой лежат в кэше фрагментов: сбрасываем их.
+    caching.bump_post(post.author_id, post.group_id, post_id=post.pk)
+
+
+def _run(post_id):
+    try:
+        generate(post_id)
+    except Exception:
+        logger.exception('Не удалось построить миниатюры поста %s', post_id)
+    finally:
+        with _lock:
+            _pending.discard(post_id)
+        connection.close()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+        return _executor
+
+
+def schedule(post):
+    if not post.image:
+        return
+    if not settings.THUMBNAIL_WORKERS:
+        generate(post.pk)
+        return
+    with _lock:
+        if post.pk in _pending:
+            return
+        _pending.add(post.pk)
+    _get_executor().submit(_run, post.pk)
+
+
+def thumbnail_for(post, geometry):
+    """Миниатюра для шаблона или None, пока она строится в фоне."""
+    if not post.image:
+        return None
+    options = dict(settings.POST_THUMBNAIL_SIZES.get(geometry, {}))
+    if not settings.THUMBNAIL_WORKERS:
+        return get_thumbnail(post.image, geometry, **options)
+    thumbnail = cached_thumbnail(post.image, geometry, **options)
+    if thumbnail is None:
+        schedule(post)
+    return thumbnail
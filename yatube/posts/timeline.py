@@ -0,0 +1,213 @@
+"""Лента подписок с раскладкой постов при записи (fan-out on write).
+
+Новый пост сразу попадает в TimelineEntry каждого подписчика, поэтому
+follow_index читает не более TIMELINE_SIZE строк одного пользователя
+вместо выборки по всем авторам из подписок. У авторов с числом
+подписчиков больше TIMELINE_FANOUT_LIMIT посты не раскладываются:
+их подписки помечаются Follow.pull и читаются напрямую.
+
+Раскладка не обрезает ленты подписчиков, чтобы публикация поста не
+стоила запроса на каждого из них: лишние записи сверх TIMELINE_SIZE
+удаляет периодическая команда trim_timelines. Чтение ленты идёт по
+индексу от начала, так что хвост до обрезки его не замедляет.
+"""
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from . import caching
+from .models import Follow, Post, TimelineEntry
+from .paginators import POSTS_PER_PAGE, CursorPaginator
+
+
+def is_celebrity(author_id):
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    return Follow.objects.filter(author_id=author_id)[limit:limit + 1].exists()
+
+
+def trim(user_id, model=TimelineEntry):
+    stale = model.objects.filter(user_id=user_id).order_by(
+        '-pub_date', '-pk'
+    ).values_list('pk', flat=True)[settings.TIMELINE_SIZE:]
+    stale = list(stale)
+    if stale:
+        model.objects.filter(pk__in=stale).delete()
+
+
+def trim_all():
+    """Обрезает все переполненные ленты; возвращает их число."""
+    user_ids = list(
+        TimelineEntry.objects.order_by().values('user_id').annotate(
+            entries=Count('pk')
+        ).filter(
+            entries__gt=settings.TIMELINE_SIZE
+        ).values_list('user_id', flat=True)
+    )
+    for user_id in user_ids:
+        trim(user_id)
+    return len(user_ids)
+
+
+def push(post):
+    followers = Follow.objects.filter(author_id=post.author_id)
+    if is_celebrity(post.author_id):
+        followers.filter(pull=False).update(pull=True)
+        return
+    user_ids = list(
+        followers.filter(pull=False).values_list('user_id', flat=True)
+    )
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                user_id=user_id,
+                post=post,
+                author_id=post.author_id,
+                pub_date=post.pub_date,
+            )
+            for user_id in user_ids
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(follow):
+    if is_celebrity(follow.author_id):
+        Follow.objects.filter(pk=follow.pk).update(pull=True)
+        return
+    posts = Post.objects.filter(author_id=follow.author_id).order_by(
+        '-pub_date'
+    ).values_list('pk', 'pub_date')[:settings.TIMELINE_SIZE]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                user_id=follow.user_id,
+                post_id=post_id,
+                author_id=follow.author_id,
+                pub_date=pub_date,
+            )
+            for post_id, pub_date in posts
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    trim(follow.user_id)
+
+
+def fill(batch_size=100, apps=global_apps):
+    """Переводит подписки с pull на раскладку и отдаёт размеры пачек.
+
+    Подписки, оформленные до появления лент или загруженные
+    import_posts, читаются напрямую. Здесь ленты их читателей
+    заполняются постами авторов, а pull снимается; подписки на авторов
+    больше чем с TIMELINE_FANOUT_LIMIT подписчиками не трогаются.
+    Работает и с историческими моделями миграций (apps из RunPython).
+    """
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    celebrities = Follow.objects.order_by().values('author_id').annotate(
+        followers=Count('pk')
+    ).filter(
+        followers__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).values('author_id')
+    follows = Follow.objects.filter(pull=True).exclude(
+        author__in=celebrities
+    ).order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(follows.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return
+        entries = []
+        for follow in batch:
+            posts = Post.objects.filter(
+                author_id=follow.author_id, is_deleted=False
+            ).order_by('-pub_date').values_list(
+                'pk', 'pub_date'
+            )[:settings.TIMELINE_SIZE]
+            entries += [
+                TimelineEntry(
+                    user_id=follow.user_id,
+                    post_id=post_id,
+                    author_id=follow.author_id,
+                    pub_date=pub_date,
+                )
+                for post_id, pub_date in posts
+            ]
+        user_ids = {follow.user_id for follow in batch}
+        with transaction.atomic():
+            # Одна вставка на пачку: построчный bulk_create на каждую
+            # подписку был основной частью времени.
+            TimelineEntry.objects.bulk_create(
+                entries, batch_size=500, ignore_conflicts=True
+            )
+            Follow.objects.filter(
+                pk__in=[follow.pk for follow in batch]
+            ).update(pull=False)
+            for user_id in user_ids:
+                trim(user_id, TimelineEntry)
+        caching.bump(*[caching.follows_scope(pk) for pk in user_ids])
+        last_pk = batch[-1].pk
+        yield len(batch)
+
+
+def prune(follow):
+    TimelineEntry.objects.filter(
+        user_id=follow.user_id, author_id=follow.author_id
+    ).delete()
+
+
+def entries_for(user):
+    """(pub_date, post_id) из TimelineEntry пользователя."""
+    return TimelineEntry.objects.filter(
+        user=user, post__is_deleted=False
+    ).values_list('pub_date', 'post_id')
+
+
+def pulled_for(user):
+    """(pub_date, pk) постов авторов, которых пользователь читает с pull."""
+    pulled = Follow.objects.filter(user=user, pull=True).values('author_id')
+    return Post.objects.filter(author__in=pulled).values_list(
+        'pub_date', 'pk'
+    )
+
+
+class TimelinePaginator(CursorPaginator):
+    """Курсорная пагинация ленты подписок.
+
+    Условие «пост в TimelineEntry ИЛИ автор с pull» не даёт базе взять
+    ни один индекс, поэтому каждый источник читается своим запросом по
+    индексу (posts_timeline_user_date_idx и posts_post_author_date_idx)
+    не дальше limit строк от курсора, а слияние идёт в Python. Посты
+    страницы приходят третьим запросом по pk.
+    """
+
+    def __init__(self, user, per_page):
+        super().__init__(Post.objects.for_feed(), per_page)
+        self.user = user
+
+    def fetch(self, limit, position=None, reverse=False):
+        prefix = '' if reverse else '-'
+        sources = [
+            (entries_for(self.user), 'post_id'),
+            (pulled_for(self.user), 'pk'),
+        ]
+        keys = set()
+        for queryset, pk_name in sources:
+            queryset = queryset.order_by(
+                prefix + 'pub_date', prefix + pk_name
+            )
+            if position is not None:
+                queryset = queryset.filter(
+                    self.after(*position, reverse=reverse, pk_name=pk_name)
+                )
+            keys.update(queryset[:limit])
+        keys = sorted(keys, reverse=not reverse)[:limit]
+        posts = self.object_list.in_bulk([pk for _, pk in keys])
+        return [posts[pk] for _, pk in keys if pk in posts]
+
+
+def get_page(user, cursor, per_page=POSTS_PER_PAGE):
+    return TimelinePaginator(user, per_page).get_page(cursor)
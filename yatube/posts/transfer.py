@@ -0,0 +1,51 @@
+"""Общие части команд export_posts и import_posts.
+
+Формат -- JSON Lines: одна запись на строку, тип записи в поле "type".
+Пользователи и группы ссылаются друг на друга по username и slug, посты
+сохраняют свои id, поэтому комментарии ссылаются на пост по id.
+Файлы с расширением .gz читаются и пишутся через gzip.
+"""
+import gzip
+import io
+import sys
+from contextlib import contextmanager
+
+RECORD_TYPES = ('user', 'group', 'post', 'comment', 'follow')
+
+
+@contextmanager
+def open_stream(path, mode):
+    if path == '-':
+        yield sys.stdin if mode == 'r' else sys.stdout
+        return
+    if path.endswith('.gz'):
+        stream = io.TextIOWrapper(
+            gzip.open(path, mode + 'b'), encoding='utf-8'
+        )
+    else:
+        stream = open(path, mode, encoding='utf-8')
+    with stream:
+        yield stream
+
+
+@contextmanager
+def keep_timestamps(*models):
+    """Отключает auto_now/auto_now_add, чтобы сохранить даты из файла."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+def rate(count, seconds):
+    return f'{count / seconds:.0f} строк/с' if seconds else '—'
@@ -0,0 +1,104 @@
+"""Популярные посты и группы.
+
+compute_trending периодически считает очки по свежим событиям: каждый
+комментарий даёт посту 1, каждый новый подписчик автора даёт
+TRENDING_FOLLOW_WEIGHT всем его постам из окна. Вес события убывает
+вдвое за TRENDING_HALF_LIFE_HOURS. Очки группы — сумма очков её постов.
+События сгруппированы по часам прямо в базе. Запросов три, а не один:
+комментарии и подписки лежат в разных таблицах, и каждый агрегат
+читает из индекса по created только окно. Общий запрос по постам
+соединял бы каждый пост со всеми подписчиками автора или вычислял
+подзапросы для каждого поста. Третий запрос читает свежие посты только
+тех авторов, у кого появились подписчики. Первые TRENDING_SIZE постов
+и групп сохраняются в TrendingPost и TrendingGroup, а страницы читают
+готовый список одним запросом.
+"""
+import heapq
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from . import caching
+from .models import Comment, Follow, Post, TrendingGroup, TrendingPost
+
+
+def decay(age, half_life):
+    # События «из будущего» (расхождение часов) считаем только что
+    # случившимися.
+    return 0.5 ** (max(age, timedelta(0)) / half_life)
+
+
+def hourly(queryset, *fields):
+    """(начало часа, *fields, число событий) по каждому часу окна."""
+    # Час идёт первым в GROUP BY: иначе SQLite выбирает индекс по
+    # первому полю и читает всю таблицу вместо окна по created.
+    keys = {f'key{i}': F(field) for i, field in enumerate(fields)}
+    return queryset.order_by().annotate(
+        hour=TruncHour('created'), **keys
+    ).values_list('hour', *keys).annotate(count=Count('pk'))
+
+
+def scores(now=None):
+    """Очки постов и групп: два Counter {pk: очки}."""
+    now = now or timezone.now()
+    since = now - timedelta(hours=settings.TRENDING_WINDOW_HOURS)
+    half_life = timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS)
+    posts, groups = Counter(), Counter()
+    comments = hourly(
+        Comment.objects.filter(created__gte=since, post__is_deleted=False),
+        'post', 'post__group',
+    )
+    for hour, post_id, group_id, count in comments:
+        score = count * decay(now - hour, half_life)
+        posts[post_id] += score
+        if group_id is not None:
+            groups[group_id] += score
+    authors = Counter()
+    for hour, author_id, count in hourly(
+        Follow.objects.filter(created__gte=since), 'author'
+    ):
+        authors[author_id] += (
+            settings.TRENDING_FOLLOW_WEIGHT * count
+            * decay(now - hour, half_life)
+        )
+    if authors:
+        boosted = Post.objects.filter(
+            author__in=list(authors), pub_date__gte=since
+        ).order_by().values_list('pk', 'author', 'group')
+        for post_id, author_id, group_id in boosted:
+            posts[post_id] += authors[author_id]
+            if group_id is not None:
+                groups[group_id] += authors[author_id]
+    return posts, groups
+
+
+def top(counter):
+    """Первые TRENDING_SIZE пар (pk, очки); при равенстве выше больший pk."""
+    return heapq.nlargest(
+        settings.TRENDING_SIZE, counter.items(),
+        key=lambda item: (item[1], item[0]),
+    )
+
+
+def refresh(now=None):
+    """Пересчитывает списки; возвращает, сколько постов и групп в них."""
+    posts, groups = scores(now)
+    posts, groups = top(posts), top(groups)
+    with transaction.atomic():
+        TrendingPost.objects.all().delete()
+        TrendingPost.objects.bulk_create([
+            TrendingPost(post_id=pk, rank=rank, score=score)
+            for rank, (pk, score) in enumerate(posts, 1)
+        ])
+        TrendingGroup.objects.all().delete()
+        TrendingGroup.objects.bulk_create([
+            TrendingGroup(group_id=pk, rank=rank, score=score)
+            for rank, (pk, score) in enumerate(groups, 1)
+        ])
+    caching.bump(caching.TRENDING)
+    return len(posts), len(groups)
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
@@ -11,7 +11,28 @@ urlpatterns = [
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<int:post_id>/comment/', views.add_comment, name='add_comment'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments',
+    ),
+    path('feeds/rss/', feeds.site_rss, name='site_rss'),
+    path('feeds/atom/', feeds.site_atom, name='site_atom'),
+    path('group/<slug:slug>/rss/', feeds.group_rss, name='group_rss'),
+    path('group/<slug:slug>/atom/', feeds.group_atom, name='group_atom'),
+    path(
+        'profile/<str:username>/rss/', feeds.author_rss, name='author_rss'
+    ),
+    path(
+        'profile/<str:username>/atom/', feeds.author_atom, name='author_atom'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('trending/', views.trending, name='trending'),
+    path(
+        'trending/groups/', views.trending_groups, name='trending_groups'
+    ),
+    path('search/', views.search, name='search'),
+    path('search/api/', views.search_api, name='search_api'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
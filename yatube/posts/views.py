@@ -1,77 +1,114 @@
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
-from .models import Post, Group, Comment, Follow
-from django.core.paginator import Paginator
+from .models import Post, Group, Comment, Follow, TrendingGroup
 from .forms import PostForm, CommentForm
+from .paginators import COMMENTS_PER_PAGE, CursorPaginator, get_page
+from . import caching, deletion, follows, stats, thumbnails, timeline
+from . import search as search_backends
+from .conditional import (
+    conditional_page, group_scope, index_scope, post_scope, profile_scope,
+)
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+
+from core.throttling import throttle
 
 User = get_user_model()
 
 
+@conditional_page(index_scope)
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.for_feed()
+    page_obj = get_page(request, post_list)
     context = {
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'following_map': follows.page_following_map(request.user, page_obj),
+        **caching.feed_context(request, page_obj, caching.POSTS),
     }
     return render(request, 'posts/index.html', context)
 
 
+@conditional_page(group_scope)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = group.posts.for_feed()
+    page_obj = get_page(request, post_list)
     context = {
         'group': group,
         'page_obj': page_obj,
+        'following_map': follows.page_following_map(request.user, page_obj),
+        **caching.feed_context(
+            request, page_obj, caching.group_scope(group.pk)
+        ),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional_page(profile_scope)
 def profile(request, username):
-    profile_author = get_object_or_404(User, username=username)
-    following = False
-    post_list = profile_author.posts.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    for follower in profile_author.following.all():
-        if request.user == follower.user:
-            following = True
-            break
+    profile_author = get_object_or_404(
+        deletion.visible_users(), username=username
+    )
+    post_list = profile_author.posts.for_feed()
+    page_obj = get_page(request, post_list)
     context = {
         'profile': profile_author,
+        'stats': stats.for_user(profile_author),
         'page_obj': page_obj,
-        'following': following
+        'following': follows.is_following(request.user, profile_author),
+        **caching.feed_context(
+            request, page_obj, caching.author_scope(profile_author.pk)
+        ),
     }
     return render(request, 'posts/profile.html', context)
 
 
+def comment_page(request, post_id):
+    """Страница комментариев по курсору (created, id), новые сверху."""
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author'
+    ).only('text_html', 'created', 'post', 'author', 'author__username')
+    return CursorPaginator(
+        comments, COMMENTS_PER_PAGE, ordering='-created'
+    ).get_page(request.GET.get('cursor'))
+
+
+@conditional_page(post_scope)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    comments = post.comments.filter(post=post).all()
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), id=post_id
+    )
     form = CommentForm()
     context = {
         'post': post,
-        'comments': comments,
+        'author_stats': stats.for_user(post.author_id),
+        'comments': comment_page(request, post_id),
         'form': form,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@conditional_page(post_scope)
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), id=post_id)
+    context = {
+        'post': post,
+        'comments': comment_page(request, post_id),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
 @login_required
+@throttle('post_create')
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        transaction.on_commit(lambda: thumbnails.schedule(post))
         return redirect('posts:profile', request.user.username)
-    form = PostForm()
     return render(request, 'posts/create_post.html', {'form': form})
 
 
@@ -84,12 +121,15 @@ def post_edit(request, post_id):
                     files=request.FILES or None, instance=post)
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            transaction.on_commit(lambda: thumbnails.schedule(post))
         return redirect('posts:post_detail', post_id)
     return render(request, 'posts/create_post.html',
                   {'form': form, 'post': post, 'is_edit': True})
 
 
 @login_required
+@throttle('add_comment')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -103,25 +143,45 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    following = request.user.follower.all()
-    author_list = []
-    for author in following:
-        author_list.append(author.author.id)
-    post_list = Post.objects.filter(author__in=author_list).order_by("-pub_date").all()
-    page_number = request.GET.get("page")
-    paginator = Paginator(post_list, 10)
-    page_obj = paginator.get_page(page_number)
+    page_obj = timeline.get_page(request.user, request.GET.get('cursor'))
     context = {
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'following_map': follows.page_following_map(request.user, page_obj),
+        **caching.feed_context(request, page_obj, caching.POSTS),
     }
     return render(request, "posts/follow.html", context)
 
 
+def trending(request):
+    """Популярные посты из списка compute_trending, одним запросом."""
+    posts = Post.objects.for_feed().filter(
+        # Условие по rank, а не isnull: так SQLite идёт по индексу
+        # rank, а не просматривает всю posts_post.
+        trending__rank__gte=1
+    ).order_by('trending__rank')
+    context = {
+        'posts': posts,
+        'following_map': follows.page_following_map(request.user, posts),
+        **caching.feed_context(
+            request, posts, caching.POSTS, caching.TRENDING
+        ),
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+def trending_groups(request):
+    context = {
+        'trending_groups': TrendingGroup.objects.select_related('group'),
+    }
+    return render(request, 'posts/trending_groups.html', context)
+
+
 @login_required
+@throttle('profile_follow', methods=None)
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    follow_check = Follow.objects.filter(user=request.user.id, author=author.id).exists()
-    if not follow_check and author != request.user:
+    author = get_object_or_404(deletion.visible_users(), username=username)
+    if (author != request.user
+            and not follows.is_following(request.user, author)):
         Follow.objects.create(user=request.user, author=author)
     return redirect("posts:profile", username=username)
 
@@ -131,3 +191,51 @@ def profile_unfollow(request, username):
     profile_author = get_object_or_404(User, username=username)
     profile_author.following.filter(user=request.user).delete()
     return redirect('posts:profile', username=username)
+
+
+def _search_page(request):
+    query = request.GET.get('q', '').strip()
+    group = author = None
+    if request.GET.get('group'):
+        group = get_object_or_404(Group, slug=request.GET['group'])
+    if request.GET.get('author'):
+        author = get_object_or_404(User, username=request.GET['author'])
+    page_obj = search_backends.get_backend().search(
+        query, group=group, author=author, cursor=request.GET.get('cursor')
+    )
+    return query, page_obj
+
+
+def search(request):
+    query, page_obj = _search_page(request)
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def search_api(request):
+    query, page_obj = _search_page(request)
+    next_url = None
+    if page_obj.has_next():
+        params = request.GET.copy()
+        params['cursor'] = page_obj.next_cursor
+        next_url = request.build_absolute_uri(
+            f'{request.path}?{params.urlencode()}'
+        )
+    results = [
+        {
+            'id': post.pk,
+            'text': post.text,
+            'author': post.author.username,
+            'group': post.group.slug if post.group else None,
+            'pub_date': post.pub_date.isoformat(),
+            'comment_count': post.comment_count,
+        }
+        for post in page_obj
+    ]
+    return JsonResponse(
+        {'query': query, 'results': results, 'next': next_url},
+        json_dumps_params={'ensure_ascii': False},
+    )
@@ -1,10 +1,13 @@
+from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
 from django.views.generic import CreateView
 
-from django.urls import reverse_lazy
+from core.throttling import throttle
 
 from .forms import CreationForm, PasswordChangeForm
 
 
+@method_decorator(throttle('signup'), name='dispatch')
 class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('posts:index')
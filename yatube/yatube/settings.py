@@ -44,9 +44,9 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'api',
-    'posts',
+    'posts.apps.PostsConfig',
     'users',
-    'core',
+    'core.apps.CoreConfig',
     'about',
     'sorl.thumbnail',
 ]
@@ -58,13 +58,74 @@ CACHES = {
     }
 }
 
+# Лента подписок: сколько постов хранится у каждого подписчика и с какого
+# числа подписчиков автор читается напрямую, без раскладки по лентам.
+TIMELINE_SIZE = 500
+TIMELINE_FANOUT_LIMIT = 1000
+
+# Фрагменты лент версионируются сигналами и не устаревают, поэтому
+# живут долго.
+FEED_CACHE_TIMEOUT = 60 * 60 * 6
+
+# Миниатюры картинок постов строятся в фоне после сохранения поста.
+# THUMBNAIL_WORKERS = 0 строит их сразу при показе, без пула потоков.
+POST_THUMBNAIL_SIZES = {
+    '960x339': {'crop': 'center', 'upscale': True},
+}
+THUMBNAIL_WORKERS = 2
+
+# Картинки постов при загрузке уменьшаются до POST_IMAGE_MAX_SIDE по
+# большей стороне и перекодируются; файлы крупнее лимита на диск
+# целиком не пишутся.
+POST_IMAGE_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 40 * 10 ** 6
+POST_IMAGE_MAX_SIDE = 1920
+POST_IMAGE_QUALITY = 85
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'posts.images.LimitedUploadHandler',
+]
+
+# Лимиты записей для core.throttling.throttle: по пользователю и по IP,
+# 'N/s', 'N/m', 'N/h' или 'N/d'. Статистика: manage.py throttle_stats.
+THROTTLE_RATES = {
+    'post_create': {'user': '10/m', 'ip': '30/m'},
+    'add_comment': {'user': '20/m', 'ip': '60/m'},
+    'profile_follow': {'user': '30/m', 'ip': '60/m'},
+    'signup': {'ip': '10/h'},
+}
+
+# Адреса и сети обратных прокси. За ними лимиты по IP считаются по
+# адресу клиента из X-Forwarded-For, иначе по REMOTE_ADDR.
+THROTTLE_TRUSTED_PROXIES = []
+
+# Полнотекстовый поиск: FTS5 для SQLite, для других баз
+# 'posts.search.DatabaseSearchBackend' или свой бэкенд.
+POSTS_SEARCH_BACKEND = 'posts.search.SQLiteFTSBackend'
+
+# HTML текста постов и комментариев строится при сохранении.
+# 'posts.markup.linkify' дополнительно превращает адреса в ссылки.
+POSTS_MARKUP_RENDERER = 'posts.markup.plain'
+
+# Популярное: очки за комментарии и новых подписчиков автора за
+# последние TRENDING_WINDOW_HOURS, вес события вдвое меньше каждые
+# TRENDING_HALF_LIFE_HOURS. Списки пересчитывает compute_trending.
+TRENDING_WINDOW_HOURS = 48
+TRENDING_HALF_LIFE_HOURS = 12
+TRENDING_FOLLOW_WEIGHT = 3
+TRENDING_SIZE = 50
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 MIDDLEWARE = [
+    'core.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.staticfiles.StaticFilesMiddleware',
+    'core.middleware.GZipMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -74,6 +135,9 @@ MIDDLEWARE = [
 ]
 
 ROOT_URLCONF = 'yatube.urls'
+
+# yatube.asgi выполняет запросы в пуле потоков такого размера.
+ASGI_THREADS = 8
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 TEMPLATES = [
     {
@@ -103,6 +167,25 @@ DATABASES = {
     }
 }
 
+# Чтения идут в реплики из DATABASE_REPLICAS (псевдонимы из DATABASES),
+# записи — в default. После записи браузер ещё REPLICA_PIN_SECONDS
+# секунд читает из default, чтобы видеть свои изменения.
+# Столько же секунд после изменения области кэша (posts.caching) страницы
+# с её ключами читаются из default: реплика может ещё отставать.
+DATABASE_ROUTERS = ['core.db.PrimaryReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_PIN_SECONDS = 10
+
+# PRAGMA, которые выполняются на каждом новом соединении с SQLite,
+# например {'journal_mode': 'wal'}. См. yatube/settings_production.py.
+SQLITE_PRAGMAS = {}
+
+# Заголовок Server-Timing (SQL, шаблоны, код представления) и журнал
+# запросов дольше PROFILING_SLOW_REQUEST_MS вместе с их SQL.
+# Выключенное профилирование не добавляет накладных расходов.
+PROFILING_ENABLED = False
+PROFILING_SLOW_REQUEST_MS = 500
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -138,6 +221,8 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+# Ответы короче этого не сжимаются.
+GZIP_MIN_LENGTH = 1024
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
@@ -148,7 +233,7 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.CursorPagination',
 }
 
 SIMPLE_JWT = {
@@ -0,0 +1,167 @@
+"""
+Настройки для запуска yatube несколькими воркерами.
+
+Подключаются через DJANGO_SETTINGS_MODULE=yatube.settings_production.
+Всё, что отличается между установками, задаётся окружением:
+
+    DJANGO_SECRET_KEY        секретный ключ (обязателен)
+    DJANGO_ALLOWED_HOSTS     имена хостов через запятую
+    YATUBE_DB_PATH           файл SQLite, по умолчанию db.sqlite3
+    YATUBE_REPLICA_PATHS     файлы реплик SQLite через запятую
+    YATUBE_CONN_MAX_AGE      сколько секунд держать соединения с базой (60)
+    YATUBE_DB_BUSY_TIMEOUT   сколько секунд ждать блокировку записи (20)
+    YATUBE_CACHE             file | db | memcached | redis (file)
+    YATUBE_CACHE_LOCATION    каталог, таблица или адрес сервера кэша
+    YATUBE_CACHE_MAX_ENTRIES размер кэша file и db (100000)
+    YATUBE_PROFILING         1 -- Server-Timing и журнал медленных запросов
+    YATUBE_SLOW_REQUEST_MS   порог медленного запроса в мс (500)
+    YATUBE_STATIC_ROOT       куда собирает collectstatic, staticfiles
+    YATUBE_ASGI_THREADS      потоков на воркер yatube.asgi (8)
+    YATUBE_TRUSTED_PROXIES   адреса и сети обратных прокси через запятую;
+                             только за ними лимиты читают X-Forwarded-For
+
+Все воркеры должны видеть один кэш, иначе счётчики поколений
+posts.caching у каждого процесса свои и сброс кэша до других воркеров
+не доходит. Кэшу "db" нужна `manage.py createcachetable`, кэшу "redis"
+-- пакет django-redis.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES, TEMPLATES
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def env_list(name, default):
+    value = os.environ.get(name)
+    if not value:
+        return default
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+# Ключ разработки из settings.py открыт, поэтому запасного значения нет.
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('Задайте переменную DJANGO_SECRET_KEY.')
+
+DEBUG = False
+
+ALLOWED_HOSTS = env_list('DJANGO_ALLOWED_HOSTS', ['localhost', '127.0.0.1'])
+
+# База данных
+
+DATABASES['default'].update({
+    'NAME': os.environ.get(
+        'YATUBE_DB_PATH', os.path.join(BASE_DIR, 'db.sqlite3')
+    ),
+    'CONN_MAX_AGE': env_int('YATUBE_CONN_MAX_AGE', 60),
+    'OPTIONS': {
+        'timeout': env_int('YATUBE_DB_BUSY_TIMEOUT', 20),
+    },
+})
+
+# Реплики для чтения, см. core.db.PrimaryReplicaRouter. Локально их
+# обновляет `manage.py replicate_sqlite --interval 1`.
+
+for number, path in enumerate(env_list('YATUBE_REPLICA_PATHS', []), 1):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+# В режиме WAL чтение не ждёт пишущего, а synchronous=NORMAL с ним
+# по-прежнему не портит базу при сбое.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': env_int('YATUBE_DB_BUSY_TIMEOUT', 20) * 1000,
+}
+
+# Кэш
+
+CACHE_BACKENDS = {
+    'file': (
+        'django.core.cache.backends.filebased.FileBasedCache',
+        os.path.join(BASE_DIR, 'cache'),
+    ),
+    'db': (
+        'django.core.cache.backends.db.DatabaseCache',
+        'yatube_cache',
+    ),
+    'memcached': (
+        'django.core.cache.backends.memcached.MemcachedCache',
+        '127.0.0.1:11211',
+    ),
+    'redis': (
+        'django_redis.cache.RedisCache',
+        'redis://127.0.0.1:6379/1',
+    ),
+}
+
+cache_name = os.environ.get('YATUBE_CACHE', 'file')
+cache_backend, cache_location = CACHE_BACKENDS[cache_name]
+
+CACHES = {
+    'default': {
+        'BACKEND': cache_backend,
+        'LOCATION': os.environ.get('YATUBE_CACHE_LOCATION', cache_location),
+        'TIMEOUT': 60 * 60 * 6,
+    }
+}
+
+# MAX_ENTRIES понимают только кэши file и db: memcached и redis передают
+# OPTIONS своим клиентским библиотекам, а те лишних ключей не принимают.
+if cache_name in ('file', 'db'):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': env_int('YATUBE_CACHE_MAX_ENTRIES', 100000),
+    }
+
+THROTTLE_TRUSTED_PROXIES = env_list('YATUBE_TRUSTED_PROXIES', [])
+
+# Шаблоны компилируются один раз на процесс, а не при каждом рендеринге.
+
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+# Статика
+
+# collectstatic пишет файлы с хэшем в имени и сжатые копии .gz (и .br,
+# если установлен пакет brotli); core.staticfiles.StaticFilesMiddleware
+# отдаёт их с долгим Cache-Control.
+STATIC_ROOT = os.environ.get(
+    'YATUBE_STATIC_ROOT', os.path.join(BASE_DIR, 'staticfiles')
+)
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
+
+# ASGI
+
+ASGI_THREADS = env_int('YATUBE_ASGI_THREADS', 8)
+
+# Профилирование
+
+PROFILING_ENABLED = os.environ.get('YATUBE_PROFILING') == '1'
+PROFILING_SLOW_REQUEST_MS = env_int('YATUBE_SLOW_REQUEST_MS', 500)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.middleware': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}